@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2011-2012 Nigel Small
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Benchmarks for syntaq. Run each module from the top of the source tree,
+e.g. `python -m bench.partitioner`.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+def best_of(function, repeat=5):
+    """ Return the fastest of several timed calls to a function, in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        t0 = time.time()
+        function()
+        times.append(time.time() - t0)
+    return min(times)
+
+
+def megabytes_per_second(size, seconds):
+    return size / seconds / 1000000.0 if seconds else float("inf")
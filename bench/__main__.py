@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2011-2012 Nigel Small
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Benchmark suite runner.
+
+    python -m bench run [-o results.json] [--size BYTES] [-k FILTER]
+    python -m bench compare baseline.json results.json [--threshold 0.1]
+"""
+
+import argparse
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import bench
+from bench import corpus
+from bench.tables import NullSink
+
+import syntaq
+from syntaq import DEFAULT_GRAMMAR, HTMLOutputStream, InlineMarkup, Markup, MarkupStream, TableRowMarkup
+
+
+def markup_html(text):
+    return Markup(text).__html__()
+
+
+def markup_parse(text):
+    return Markup(text)
+
+
+def stream_html(text):
+    MarkupStream(text).write(HTMLOutputStream(sink=NullSink()))
+
+
+def inline_html(text):
+    return InlineMarkup(text).__html__()
+
+
+def table_rows_html(text):
+    return [TableRowMarkup(line).__html__() for line in text.splitlines()]
+
+
+def partition(text):
+    return list(DEFAULT_GRAMMAR.inline_partitioner.partition(text))
+
+
+CASES = [("markup/" + name, name, markup_html) for name in sorted(corpus.GENERATORS)] + [
+    ("parse/mixed", "mixed", markup_parse),
+    ("parse/nested_lists", "nested_lists", markup_parse),
+    ("inline/long_paragraph", "long_paragraph", inline_html),
+    ("inline/links", "links", inline_html),
+    ("inline/escapes", "escapes", inline_html),
+    ("table_row/wide_table", "wide_table", table_rows_html),
+    ("table_row/tall_table", "tall_table", table_rows_html),
+    ("stream/wide_table", "wide_table", stream_html),
+    ("stream/tall_table", "tall_table", stream_html),
+    ("partitioner/long_paragraph", "long_paragraph", partition),
+    ("partitioner/escapes", "escapes", partition),
+]
+
+
+def peak_memory(function, text):
+    tracemalloc.start()
+    try:
+        function(text)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(size=262144, repeat=3, seed=0, pattern=None, out=sys.stdout):
+    results = {}
+    for name, construct, function in CASES:
+        if pattern and pattern not in name:
+            continue
+        text = corpus.generate(construct, size, seed)
+        length = len(text.encode("utf-8"))
+        seconds = bench.best_of(lambda: function(text), repeat)
+        result = {
+            "bytes": length,
+            "ops_per_sec": 1.0 / seconds if seconds else float("inf"),
+            "mb_per_sec": bench.megabytes_per_second(length, seconds),
+            "peak_bytes": peak_memory(function, text),
+        }
+        results[name] = result
+        out.write("{0:<28} {1:10.2f} ops/s {2:8.2f} MB/s {3:12,d} B peak\n".format(
+            name, result["ops_per_sec"], result["mb_per_sec"], result["peak_bytes"]))
+    return {
+        "syntaq": syntaq.__version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "size": size,
+        "seed": seed,
+        "time": time.time(),
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=0.1, out=sys.stdout):
+    # Flags every case that has become slower or uses more memory than the
+    # baseline by more than `threshold` (as a fraction); returns the number
+    # of regressions.
+    regressions = 0
+    for name in sorted(current["results"]):
+        if name not in baseline["results"]:
+            out.write("{0:<28} (new)\n".format(name))
+            continue
+        old, new = baseline["results"][name], current["results"][name]
+        speed = new["mb_per_sec"] / old["mb_per_sec"] if old["mb_per_sec"] else 1.0
+        memory = float(new["peak_bytes"]) / old["peak_bytes"] if old["peak_bytes"] else 1.0
+        flags = []
+        if speed < 1.0 - threshold:
+            flags.append("SLOWER")
+        if memory > 1.0 + threshold:
+            flags.append("MORE MEMORY")
+        regressions += bool(flags)
+        out.write("{0:<28} speed {1:6.2f}x memory {2:6.2f}x {3}\n".format(name, speed, memory, " ".join(flags)))
+    return regressions
+
+
+def load(path):
+    with io.open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog="python -m bench")
+    commands = parser.add_subparsers(dest="command")
+    run_parser = commands.add_parser("run", help="run the benchmark suite")
+    run_parser.add_argument("-o", "--output", help="write results to this JSON file")
+    run_parser.add_argument("-k", "--filter", help="only run cases whose names contain this")
+    run_parser.add_argument("--size", type=int, default=262144, help="approximate corpus size in characters")
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--baseline", help="compare the results with this JSON file")
+    run_parser.add_argument("--threshold", type=float, default=0.1)
+    compare_parser = commands.add_parser("compare", help="compare two sets of results")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+    options = parser.parse_args(args)
+    if options.command == "run":
+        results = run(options.size, options.repeat, options.seed, options.filter)
+        if options.output:
+            with io.open(options.output, "w", encoding="utf-8") as f:
+                f.write(json.dumps(results, indent=2, sort_keys=True))
+        if options.baseline:
+            return 1 if compare(load(options.baseline), results, options.threshold) else 0
+    elif options.command == "compare":
+        return 1 if compare(load(options.baseline), load(options.current), options.threshold) else 0
+    else:
+        parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
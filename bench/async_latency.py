@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2011-2012 Nigel Small
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Latency of small requests served on an asyncio event loop while large
+documents are rendered alongside them, for each way of rendering the large
+documents.
+"""
+
+import asyncio
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from bench import corpus
+
+from syntaq import AsyncRenderer, Document
+
+
+SMALL = "= Small\n\nA short page with **bold** and //italic// text.\n\n* one\n* two\n"
+
+
+async def serve(render_large, large, duration, interval):
+    loop = asyncio.get_running_loop()
+    latencies = []
+    running = True
+
+    def small_request(arrival):
+        Document(SMALL).__html__()
+        latencies.append(loop.time() - arrival)
+
+    async def large_requests():
+        while running:
+            await render_large(large)
+
+    background = asyncio.ensure_future(large_requests())
+    start = loop.time()
+    # requests arrive on a fixed schedule, so time spent waiting for a
+    # blocked loop counts towards their latency
+    for i in range(int(duration / interval)):
+        loop.call_at(start + i * interval, small_request, start + i * interval)
+    await asyncio.sleep(duration)
+    while len(latencies) < int(duration / interval):
+        await asyncio.sleep(interval)
+    running = False
+    await background
+    return sorted(latencies)
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+    large = corpus.generate("mixed", size)
+    threads = AsyncRenderer()
+    in_loop = AsyncRenderer(yield_every=16)
+    with ProcessPoolExecutor(1) as executor:
+        processes = AsyncRenderer(executor)
+        modes = [
+            ("none", None),
+            ("blocking", lambda markup: asyncio.sleep(0, Document(markup).__html__())),
+            ("in-loop", lambda markup: in_loop.render(markup, in_loop=True)),
+            ("threads", threads.render),
+            ("processes", processes.render),
+        ]
+        for name, render_large in modes:
+            if render_large is None:
+                render_large = lambda markup: asyncio.sleep(0.01)
+            latencies = asyncio.run(serve(render_large, large, duration, 0.005))
+            print("{0:<10} {1:6d} requests  p50 {2:8.2f} ms  p99 {3:8.2f} ms  max {4:8.2f} ms".format(
+                name, len(latencies), 1000 * percentile(latencies, 0.5),
+                1000 * percentile(latencies, 0.99), 1000 * latencies[-1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2011-2012 Nigel Small
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" URL autolinking on ordinary text, line by line, and on input which makes
+the URL pattern backtrack, compared with the original implementation which
+split every text run on the pattern.
+"""
+
+import sys
+
+from bench import best_of, corpus, megabytes_per_second
+
+from syntaq import HTMLOutputStream, URL, auto_link
+
+
+def legacy_auto_link(text):
+    out = HTMLOutputStream()
+    bits = URL.split(text)
+    out.write_text(bits[0])
+    p = 1
+    while p < len(bits):
+        url = bits[p]
+        out.element("a", {"href": url}, text=url)
+        p += 5
+        out.write_text(bits[p])
+        p += 1
+    return out.__html__()
+
+
+# (name, text for n repeats, largest n the pattern is timed for)
+PATHOLOGICAL = [
+    ("commas", lambda n: "http://x" + "," * n, 20),
+    ("dot-commas", lambda n: "http://" + ".," * n, 10),
+]
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    for name in ("paragraphs", "autolinks", "mixed"):
+        lines = corpus.generate(name, size).splitlines()
+        for variant, function in (("legacy", legacy_auto_link), ("linear", auto_link)):
+            seconds = best_of(lambda: [function(line) for line in lines], repeat=3)
+            print("{0:<12} {1:<8} {2:10.2f} MB/s".format(name, variant, megabytes_per_second(size, seconds)))
+    for name, text, limit in PATHOLOGICAL:
+        for n in (4, 8, 10, 12, 16, 20, 1000, 100000):
+            results = ["linear {0:10.6f}s".format(best_of(lambda: auto_link(text(n)), repeat=3))]
+            if n <= limit:
+                results.append("legacy {0:10.6f}s".format(best_of(lambda: legacy_auto_link(text(n)), repeat=1)))
+            print("{0:<12} {1:>7} repeats  {2}".format(name, n, "  ".join(results)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2011-2012 Nigel Small
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Peak resident memory and wall time rendering a very large file: read in
+full and rendered as one string, as the command line used to, against
+mapped, decoded and rendered a chunk at a time with Document.from_file.
+
+    python -m bench.big_input [MEGABYTES]
+
+Each case runs in its own process so that its peak size is its own.
+"""
+
+import io
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench import corpus
+
+from syntaq import Document, HTMLOutputStream
+
+
+class NullSink(object):
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, chunk):
+        self.size += len(chunk)
+
+
+def whole(path):
+    with io.open(path, encoding="utf-8") as f:
+        return len(Document(f.read()).__html__())
+
+
+def mapped(path):
+    sink = NullSink()
+    Document.from_file(path).write(HTMLOutputStream(sink=sink))
+    return sink.size
+
+
+CASES = {"whole": whole, "mapped": mapped}
+
+
+def run(name, path):
+    t0 = time.time()
+    size = CASES[name](path)
+    seconds = time.time() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak //= 1024
+    print("{0} {1} {2}".format(seconds, peak, size))
+
+
+def write_input(path, megabytes):
+    block = corpus.generate("mixed", 1000000).encode("utf-8")
+    with open(path, "wb") as f:
+        for _ in range(max(1, megabytes * 1000000 // len(block))):
+            f.write(block)
+
+
+def main():
+    if len(sys.argv) > 2:
+        return run(sys.argv[1], sys.argv[2])
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    root = tempfile.mkdtemp()
+    try:
+        path = os.path.join(root, "input.syntaq")
+        write_input(path, megabytes)
+        print("input {0:,d} bytes".format(os.path.getsize(path)))
+        for name in ("whole", "mapped"):
+            process = subprocess.Popen([sys.executable, "-m", "bench.big_input", name, path],
+                                       stdout=subprocess.PIPE)
+            output = process.communicate()[0]
+            if process.returncode:
+                print("{0:<7} failed with exit status {1}".format(name, process.returncode))
+                continue
+            seconds, peak, size = output.split()
+            print("{0:<7} {1:8.2f}s  peak RSS {2:10,d} kB  output {3:,d} chars".format(
+                name, float(seconds), int(peak), int(size)))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2011-2012 Nigel Small
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Block-level parsing alone, without rendering, in lines per second for
+each construct.
+"""
+
+import sys
+
+from bench import best_of, corpus
+
+from syntaq import BlockParser
+
+
+CONSTRUCTS = ("mixed", "paragraphs", "headings", "nested_lists", "tall_table", "code_block")
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    for name in CONSTRUCTS:
+        lines = corpus.generate(name, size).splitlines(True)
+        seconds = best_of(lambda: list(BlockParser().parse(lines)), repeat=9)
+        print("{0:<14} {1:8.4f}s  {2:12,.0f} lines/s".format(name, seconds, len(lines) / seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2011-2012 Nigel Small
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Scaling of compile_many from one worker process up to one per core.
+"""
+
+import multiprocessing
+import sys
+import time
+
+import bench
+
+from syntaq import compile_many
+
+
+def page(i):
+    return "\n".join([
+        "= Page {0}".format(i),
+        "",
+        "Some **bold** and //italic// text with a [[link|label]] and http://example.com/{0}.".format(i),
+        "",
+        "* first item",
+        "** nested item",
+        "* second item",
+        "",
+        "|=Name|=Value|",
+        "|foo|{0}|".format(i),
+        "|bar|``code``|",
+        "",
+    ] * 10)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    documents = [page(i) for i in range(count)]
+    size = sum(len(document) for document in documents)
+    cores = multiprocessing.cpu_count()
+    workers = 1
+    baseline = None
+    while True:
+        t0 = time.time()
+        for result in compile_many(documents, workers=workers):
+            assert result.error is None
+        seconds = time.time() - t0
+        baseline = baseline or seconds
+        print("{0:>3} workers {1:8.1f} docs/s {2:8.2f} MB/s {3:6.2f}x".format(
+            workers, count / seconds, bench.megabytes_per_second(size, seconds), baseline / seconds))
+        if workers >= cores:
+            break
+        workers = min(2 * workers, cores)
+
+
+if __name__ == "__main__":
+    main()
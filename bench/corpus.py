@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2011-2012 Nigel Small
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Seeded generators of synthetic markup, one per construct. Each takes a
+random number generator and an approximate size in characters and returns
+a markup string.
+"""
+
+import random
+
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua enim ad minim veniam "
+    "quis nostrud exercitation ullamco laboris nisi aliquip ex ea commodo"
+).split()
+
+INLINE = ("**{0}**", "//{0}//", "``{0}``", "^^{0}^^", ",,{0},,", '""{0}""', "{0}")
+
+
+def words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def sentence(rng):
+    return " ".join(rng.choice(INLINE).format(words(rng, rng.randint(1, 4)))
+                    for _ in range(rng.randint(3, 8))) + "."
+
+
+def fill(size, chunk):
+    parts, total = [], 0
+    while total < size:
+        part = chunk()
+        parts.append(part)
+        total += len(part)
+    return "".join(parts)
+
+
+def long_paragraph(rng, size):
+    return fill(size, lambda: sentence(rng) + " ") + "\n"
+
+
+def paragraphs(rng, size):
+    return fill(size, lambda: sentence(rng) + "\n" + sentence(rng) + "\n\n")
+
+
+def headings(rng, size):
+    return fill(size, lambda: "=" * rng.randint(1, 6) + " " + words(rng, 4) + "\n" + sentence(rng) + "\n\n")
+
+
+def nested_lists(rng, size, depth=8):
+    def item():
+        level = rng.randint(1, depth)
+        signature = "".join(rng.choice("*#") for _ in range(level))
+        return signature + " " + sentence(rng) + "\n"
+    return fill(size, item)
+
+
+def wide_table(rng, size, columns=50):
+    def row():
+        return "|" + "|".join(words(rng, 1) for _ in range(columns)) + "|\n"
+    return "|" + "|".join("=" + words(rng, 1) for _ in range(columns)) + "|\n" + fill(size, row)
+
+
+def tall_table(rng, size):
+    def row():
+        return "|{0}| {1} |[[{2}]]|\n".format(words(rng, 1), rng.randint(0, 10000), words(rng, 1))
+    return "|=Name|=Value|=Link|\n" + fill(size, row)
+
+
+def preformatted(rng, size):
+    return "{{{\n" + fill(size, lambda: words(rng, 8) + " <&> \"quoted\"\n") + "}}}\n"
+
+
+def code_block(rng, size):
+    return "``` python\n" + fill(size, lambda: "    if x < {0} and y > 'z': pass\n".format(rng.randint(0, 99))) + "```\n"
+
+
+def links(rng, size):
+    return fill(size, lambda: "[[{0}|{1}]] {2}\n".format(words(rng, 1), words(rng, 2), words(rng, 3)))
+
+
+def autolinks(rng, size):
+    return fill(size, lambda: "see http://{0}.example.com/{1}?q={2} and www.{0}.org {3}\n".format(
+        words(rng, 1), words(rng, 1), rng.randint(0, 999), words(rng, 2)))
+
+
+def escapes(rng, size):
+    return fill(size, lambda: "~** {0} ~// ~~ ~[[{1}~]] ~| ~{{{{ {2}\n".format(
+        words(rng, 1), words(rng, 1), words(rng, 2)))
+
+
+def mixed(rng, size):
+    generators = (paragraphs, headings, nested_lists, tall_table, preformatted, code_block, links, autolinks)
+    return fill(size, lambda: rng.choice(generators)(rng, 2000) + "\n")
+
+
+GENERATORS = {
+    "long_paragraph": long_paragraph,
+    "paragraphs": paragraphs,
+    "headings": headings,
+    "nested_lists": nested_lists,
+    "wide_table": wide_table,
+    "tall_table": tall_table,
+    "preformatted": preformatted,
+    "code_block": code_block,
+    "links": links,
+    "autolinks": autolinks,
+    "escapes": escapes,
+    "mixed": mixed,
+}
+
+
+def generate(name, size, seed=0):
+    return GENERATORS[name](random.Random(seed), size)
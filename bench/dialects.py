@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2011-2012 Nigel Small
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Rendering with the default dialect, with one extended by mentions and
+issue references, and with a minimal one for comments which has no images,
+preformatted spans, sub- or superscript, or tables.
+"""
+
+import re
+import sys
+import time
+
+from bench import corpus
+
+from syntaq import ROW_LINE, Grammar, Markup, TokenRegistry
+
+
+WORD = re.compile(r"\w*")
+
+
+def reference(prefix, url):
+    # renders the marker and the word after it as a link
+    def link(out, tokens, token):
+        text = tokens.peek()
+        word = WORD.match(text or "").group()
+        if not word:
+            out.write_text(token)
+            return
+        tokens.advance()
+        out.write_html('<a href="{0}{1}">{2}{1}</a>'.format(url, word, prefix))
+        out.write_text(text[len(word):], post_process=True)
+    return link
+
+
+def dialects():
+    extended = TokenRegistry.default()
+    extended.add("@", reference("@", "/users/"))
+    extended.add("#", reference("#", "/issues/"))
+    minimal = TokenRegistry.default()
+    minimal.remove("{{", "}}", "{{{", "}}}", "^^", ",,")
+    minimal.remove_block(ROW_LINE)
+    return (
+        ("default", Grammar()),
+        ("extended", Grammar(registry=extended)),
+        ("minimal", Grammar(registry=minimal)),
+    )
+
+
+CONSTRUCTS = ("mixed", "paragraphs", "links", "autolinks")
+
+
+def best_of_interleaved(functions, repeat=7):
+    # each round times every function once, so that any drift in the speed
+    # of the machine falls on all of them alike
+    times = [float("inf")] * len(functions)
+    for _ in range(repeat):
+        for i, function in enumerate(functions):
+            t0 = time.time()
+            function()
+            times[i] = min(times[i], time.time() - t0)
+    return times
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    grammars = dialects()
+    for name in CONSTRUCTS:
+        text = corpus.generate(name, size)
+        times = best_of_interleaved([lambda grammar=grammar: Markup(text, grammar).__html__()
+                                     for _, grammar in grammars])
+        print("{0:<12} ".format(name) + "  ".join(
+            "{0} {1:7.4f}s {2:5.2f}x".format(label, seconds, times[0] / seconds)
+            for (label, _), seconds in zip(grammars, times)))
+
+
+if __name__ == "__main__":
+    main()
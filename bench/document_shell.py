@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2011-2012 Nigel Small
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Rendering documents to encoded bytes with the style sheet inlined or
+linked, compared with encoding the rendered text.
+"""
+
+import sys
+
+from bench import best_of, corpus
+
+from syntaq import Document
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    text = corpus.generate("mixed", size)
+    pages = 1000
+    encode = best_of(lambda: [Document(text).__html__().encode("utf-8") for _ in range(pages)], repeat=3)
+    print("{0:<22} {1:8.4f}s  {2:9d} bytes/page".format(
+        "__html__().encode()", encode, len(Document(text).__html__().encode("utf-8"))))
+    for label, stylesheet in (("render_bytes inline", None), ("render_bytes external", "syntaq.css")):
+        seconds = best_of(lambda: [Document(text, stylesheet=stylesheet).render_bytes() for _ in range(pages)],
+                          repeat=3)
+        print("{0:<22} {1:8.4f}s  {2:9d} bytes/page".format(
+            label, seconds, len(Document(text, stylesheet=stylesheet).render_bytes())))
+
+
+if __name__ == "__main__":
+    main()
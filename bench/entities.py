@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2011-2012 Nigel Small
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" HTML escaping for short, long and entity-dense strings, compared with
+the original character-by-character implementation.
+"""
+
+from bench import best_of, megabytes_per_second
+
+from syntaq import HTML
+
+
+def legacy_entities(text):
+    chars = list(text)
+    for i, ch in enumerate(chars):
+        if ch == "&":
+            chars[i] = "&amp;"
+        elif ch == "'":
+            chars[i] = "&apos;"
+        elif ch == "\"":
+            chars[i] = "&quot;"
+        elif ch == "<":
+            chars[i] = "&lt;"
+        elif ch == ">":
+            chars[i] = "&gt;"
+    return "".join(chars)
+
+
+SAMPLES = [
+    ("short", ["foo bar", "Table cell", "x = y + 1"] * 10000),
+    ("short-entities", ["foo & bar", "<em>", "it's"] * 10000),
+    ("long", ["The quick brown fox jumps over the lazy dog. " * 20000]),
+    ("long-unicode", [u"Grüße aus Köln, café crème. " * 20000]),
+    ("dense", ["<a href=\"x\">&'</a>" * 50000]),
+]
+
+
+def main():
+    for name, texts in SAMPLES:
+        size = sum(len(text.encode("utf-8")) for text in texts)
+        data = [text.encode("utf-8") for text in texts]
+        results = [
+            ("legacy", best_of(lambda: [legacy_entities(text) for text in texts], repeat=3)),
+            ("str", best_of(lambda: [HTML.entities(text) for text in texts], repeat=3)),
+            ("bytes", best_of(lambda: [HTML.entities_bytes(d) for d in data], repeat=3)),
+        ]
+        for variant, seconds in results:
+            print("{0:<16} {1:<7} {2:10.2f} MB/s".format(name, variant, megabytes_per_second(size, seconds)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2011-2012 Nigel Small
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Memory held by a parsed Markup document per megabyte of input.
+"""
+
+import gc
+import sys
+import tracemalloc
+
+from bench import corpus
+
+from syntaq import Markup
+
+
+CONSTRUCTS = ("mixed", "paragraphs", "nested_lists", "tall_table", "wide_table", "preformatted", "code_block")
+
+
+def retained(text):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        markup = Markup(text)
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del markup
+    return after - before
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    for name in CONSTRUCTS:
+        text = corpus.generate(name, size)
+        per_megabyte = retained(text) * 1000000.0 / len(text.encode("utf-8"))
+        print("{0:<14} {1:12,.0f} bytes held per MB of input".format(name, per_megabyte))
+
+
+if __name__ == "__main__":
+    main()
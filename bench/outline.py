@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2011-2012 Nigel Small
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Scanning for the title and heading outline of a document, compared with
+a full parse.
+"""
+
+import sys
+
+from bench import best_of, corpus
+
+from syntaq import Markup, outline
+
+
+CONSTRUCTS = ("mixed", "paragraphs", "headings", "tall_table", "nested_lists", "code_block")
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    for name in CONSTRUCTS:
+        text = corpus.generate(name, size)
+        parse = best_of(lambda: Markup(text), repeat=3)
+        scan = best_of(lambda: outline(text), repeat=3)
+        print("{0:<14} parse {1:8.4f}s  outline {2:8.4f}s  {3:7.1f}x".format(name, parse, scan, parse / scan))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2011-2012 Nigel Small
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Loading a parse from a ParseCache compared with parsing the source again.
+"""
+
+import shutil
+import sys
+import tempfile
+
+from bench import best_of, corpus
+
+from syntaq import Markup, ParseCache
+
+
+CONSTRUCTS = ("mixed", "paragraphs", "nested_lists", "tall_table", "code_block", "headings")
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    directory = tempfile.mkdtemp()
+    try:
+        cache = ParseCache(directory)
+        for name in CONSTRUCTS:
+            text = corpus.generate(name, size)
+            cache.markup(text)
+            parse = best_of(lambda: Markup(text), repeat=3)
+            # the blocks are restored as part of the load, so that what is
+            # timed is a parse ready to walk or render, as Markup() gives
+            load = best_of(lambda: cache.get(text).blocks, repeat=3)
+            print("{0:<14} parse {1:8.4f}s  load+blocks {2:8.4f}s ({3:5.1f}x)".format(
+                name, parse, load, parse / load))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
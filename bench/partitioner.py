@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2011-2012 Nigel Small
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+""" Throughput of the Partitioner engines over the inline marker set.
+"""
+
+from bench import best_of, megabytes_per_second
+
+from syntaq import Partitioner
+
+
+INLINE_MARKERS = (
+    "http://", "https://", "ftp://", "mailto:",
+    '"""', "{{{", "}}}", "<--", "-->",
+    "\\\\", "{{", "}}", "``", '""',
+    "**", "//", "^^", ",,", "[[", "]]", "|",
+)
+
+SAMPLES = {
+    "plain": "The quick brown fox jumps over the lazy dog. " * 20000,
+    "marked": "Some **bold** and //italic// text with a [[link|label]] and ``code``. " * 12000,
+    "escaped": "~** ~// ~~ ~[[ not markup ~| here, " * 20000,
+}
+
+
+def main():
+    for name, markup in sorted(SAMPLES.items()):
+        size = len(markup.encode("utf-8"))
+        for engine in Partitioner.engines:
+            partitioner = Partitioner("~", *INLINE_MARKERS, engine=engine)
+            seconds = best_of(lambda: list(partitioner.partition(markup)), repeat=3)
+            print("{0:<8} {1:<6} {2:8.2f} MB/s".format(name, engine, megabytes_per_second(size, seconds)))
+
+
+if __name__ == "__main__":
+    main()
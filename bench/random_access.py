@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2011-2012 Nigel Small
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Rendering one page of blocks from a long parsed document, as a viewer
+paginating it would, against rendering the whole document.
+"""
+
+import sys
+
+from bench import best_of, corpus
+
+from syntaq import Markup
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    page = 60
+    markup = Markup(corpus.generate("mixed", size))
+    count = len(markup)
+    whole = best_of(markup.__html__, repeat=3)
+    print("{0} blocks, {1} sections".format(count, len(markup.sections())))
+    print("{0:<24} {1:10.5f}s".format("whole document", whole))
+    for start in (200, count // 2, count - page):
+        seconds = best_of(lambda: markup.render_range(start, start + page), repeat=5)
+        print("{0:<24} {1:10.5f}s {2:8.1f}x".format(
+            "blocks {0}-{1}".format(start, start + page), seconds, whole / seconds))
+    memoized = Markup(corpus.generate("mixed", size), memoize=True)
+    memoized.render_range(200, 200 + page)
+    seconds = best_of(lambda: memoized.render_range(200, 200 + page), repeat=5)
+    print("{0:<24} {1:10.5f}s {2:8.1f}x".format("blocks 200-260 memoized", seconds, whole / seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2011-2012 Nigel Small
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Streaming very large tables: throughput for wide (50 column) and tall
+(1,000,000 row) tables, and peak memory as the number of rows grows.
+
+    python -m bench.tables [ROWS]
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+
+from bench import corpus
+
+from syntaq import HTMLOutputStream, Markup, MarkupStream
+
+
+class NullSink(object):
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, chunk):
+        self.size += len(chunk)
+
+
+def wide_rows(count, columns=50):
+    rng = random.Random(0)
+    yield "|" + "|".join("=" + corpus.words(rng, 1) for _ in range(columns)) + "|\n"
+    for _ in range(count):
+        yield "|" + "|".join(corpus.words(rng, 1) for _ in range(columns)) + "|\n"
+
+
+def tall_rows(count):
+    rng = random.Random(0)
+    yield "|=Name|=Value|=Link|\n"
+    for i in range(count):
+        yield "|{0}| {1} |[[{2}]]|\n".format(corpus.words(rng, 1), i, corpus.words(rng, 1))
+
+
+def stream(rows, table_rows=None):
+    sink = NullSink()
+    MarkupStream(rows, table_rows=table_rows).write(HTMLOutputStream(sink=sink))
+    return sink.size
+
+
+def whole(rows):
+    return len(Markup("".join(rows)).__html__())
+
+
+def peak(function, rows):
+    tracemalloc.start()
+    try:
+        function(rows)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    for name, generate, count in (("wide", wide_rows, rows // 20), ("tall", tall_rows, rows)):
+        for table_rows in (1, 256):
+            t0 = time.time()
+            size = stream(generate(count), table_rows)
+            seconds = time.time() - t0
+            print("{0:<5} {1:>8} rows  batch {2:>4}  {3:10.0f} rows/s {4:8.2f} MB/s out".format(
+                name, count, table_rows, count / seconds, size / seconds / 1000000.0))
+    for count in (1000, 10000, 100000):
+        print("tall  {0:>8} rows  peak {1:12,d} B streamed  {2:12,d} B whole".format(
+            count, peak(stream, tall_rows(count)), peak(whole, tall_rows(count))))
+
+
+if __name__ == "__main__":
+    main()
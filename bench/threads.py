@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2011-2012 Nigel Small
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+""" Throughput of render_many_threaded as the number of threads grows. On a
+standard build the GIL keeps rendering to one core, so throughput should
+stay flat; on a free-threaded build (3.13t and later) it should rise with
+the number of threads up to the number of cores.
+
+    python -m bench.threads [DOCUMENTS]
+"""
+
+import multiprocessing
+import sys
+import time
+
+from bench import corpus
+
+from syntaq import render_many_threaded
+
+
+def build():
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    if is_gil_enabled is None:
+        return "standard"
+    return "free-threaded, GIL {0}".format("enabled" if is_gil_enabled() else "disabled")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    documents = [corpus.generate("mixed", 10000) for _ in range(count)]
+    size = sum(len(document) for document in documents)
+    cores = multiprocessing.cpu_count()
+    print("Python {0} ({1}), {2} cores".format(sys.version.split()[0], build(), cores))
+    baseline = None
+    threads = 1
+    while True:
+        t0 = time.time()
+        for result in render_many_threaded(documents, workers=threads):
+            assert result.error is None
+        seconds = time.time() - t0
+        baseline = baseline or seconds
+        print("{0:>3} threads {1:8.1f} docs/s {2:8.2f} MB/s {3:6.2f}x".format(
+            threads, count / seconds, size / seconds / 1000000.0, baseline / seconds))
+        if threads >= max(cores, 4):
+            break
+        threads *= 2
+
+
+if __name__ == "__main__":
+    main()
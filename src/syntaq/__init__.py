@@ -16,8 +16,46 @@
 # limitations under the License.
 
 
+import codecs
+import hashlib
+import marshal
+import mmap
+import multiprocessing
+import os
 import re
 import string
+import sys
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict, deque, namedtuple
+from itertools import chain, islice
+
+try:
+    string_types = (str, unicode)
+except NameError:
+    string_types = (str,)
+
+try:
+    from types import MappingProxyType
+except ImportError:
+    # Python 2 has no read-only view of a dict
+    MappingProxyType = dict
+
+try:
+    replace_file = os.replace
+except AttributeError:
+    # Python 2 has no os.replace, and its os.rename will not overwrite an
+    # existing file on Windows
+    def replace_file(source, destination):
+        try:
+            os.rename(source, destination)
+        except OSError:
+            if not os.path.exists(destination):
+                raise
+            os.remove(destination)
+            os.rename(source, destination)
 
 __author__    = "Nigel Small <nigel@nigelsmall.com>"
 __copyright__ = "Copyright 2012 Nigel Small"
@@ -176,30 +214,98 @@ def html(object):
 
 class HTML(object):
 
+    # ampersands must be replaced first so that the other entities are not
+    # escaped a second time
+    ENTITIES = (
+        ("&", "&amp;"),
+        ("'", "&apos;"),
+        ("\"", "&quot;"),
+        ("<", "&lt;"),
+        (">", "&gt;"),
+    )
+
+    BYTE_ENTITIES = tuple(
+        (char.encode("ascii"), entity.encode("ascii"))
+        for char, entity in ENTITIES
+    )
+
+    # a single regex search beats five substring tests on short byte
+    # strings, where the per-call overhead of `in` dominates
+    BYTE_ENTITY_CHARS = re.compile(b"[&'\"<>]")
+
     @staticmethod
     def entities(text):
-        chars = list(text)
-        for i, ch in enumerate(chars):
-            if ch == "&":
-                chars[i] = "&amp;"
-            elif ch == "'":
-                chars[i] = "&apos;"
-            elif ch == "\"":
-                chars[i] = "&quot;"
-            elif ch == "<":
-                chars[i] = "&lt;"
-            elif ch == ">":
-                chars[i] = "&gt;"
-        return "".join(chars)
+        if "&" not in text and "'" not in text and "\"" not in text and \
+                "<" not in text and ">" not in text:
+            return text
+        for char, entity in HTML.ENTITIES:
+            text = text.replace(char, entity)
+        return text
+
+    @staticmethod
+    def entities_bytes(data):
+        if len(data) < 256:
+            if not HTML.BYTE_ENTITY_CHARS.search(data):
+                return data
+        elif b"&" not in data and b"'" not in data and b"\"" not in data and \
+                b"<" not in data and b">" not in data:
+            return data
+        for char, entity in HTML.BYTE_ENTITIES:
+            data = data.replace(char, entity)
+        return data
+
+
+class ListSink(object):
+
+    def __init__(self):
+        self.chunks = []
+
+    def __html__(self):
+        return "".join(self.chunks)
+
+    def write(self, chunk):
+        self.chunks.append(chunk)
+
+
+class FileSink(object):
+
+    def __init__(self, file, encoding=None):
+        # text files take str chunks; give an encoding for binary files
+        self.file = file
+        self.encoding = encoding
+
+    def write(self, chunk):
+        if self.encoding:
+            self.file.write(chunk.encode(self.encoding))
+        else:
+            self.file.write(chunk)
+
+
+class IterableSink(object):
+
+    def __init__(self):
+        self.chunks = []
+
+    def drain(self):
+        chunks, self.chunks = self.chunks, []
+        return chunks
+
+    def write(self, chunk):
+        self.chunks.append(chunk)
 
 
 class HTMLOutputStream(object):
 
-    def __init__(self, processor=None):
+    default_chunk_size = 8192
+
+    def __init__(self, processor=None, sink=None, chunk_size=None):
         self.tokens = []
         self.stack = []
         self.token_buffer = []
         self.processor = processor or HTML.entities
+        self.sink = sink
+        self.chunk_size = chunk_size or self.default_chunk_size
+        self.size = 0
 
     def __html__(self):
         return "".join(self.tokens)
@@ -209,20 +315,35 @@ class HTMLOutputStream(object):
 
     def _flush(self):
         if self.token_buffer:
-            buffer = "".join(self.token_buffer)
-            self.tokens.append(self.processor(buffer))
-            self.token_buffer = []
+            # the buffer is emptied first, as writing may flush to the sink
+            buffer, self.token_buffer = "".join(self.token_buffer), []
+            self._write(self.processor(buffer))
+
+    def _write(self, html):
+        self.tokens.append(html)
+        if self.sink is not None:
+            self.size += len(html)
+            if self.size >= self.chunk_size:
+                self.flush()
+
+    def flush(self):
+        # passes everything written so far through to the sink, if any
+        self._flush()
+        if self.sink is not None and self.tokens:
+            self.sink.write("".join(self.tokens))
+            self.tokens = []
+            self.size = 0
 
     def write_html(self, html):
         self._flush()
-        self.tokens.append(html)
+        self._write(html)
 
     def write_text(self, text, post_process=False):
         if post_process:
-            self.token_buffer.extend(text)
+            self.token_buffer.append(text)
         else:
             self._flush()
-            self.tokens.extend(HTML.entities(text))
+            self._write(HTML.entities(text))
 
     def tag(self, tag, attributes=None):
         if attributes:
@@ -270,21 +391,66 @@ class HTMLOutputStream(object):
         while self.stack:
             t = self.stack.pop()
             self.write_html("</{0}>".format(t))
+        if self.sink is not None:
+            self.flush()
 
 
 class Partitioner(object):
 
-    def __init__(self, escape, *markers):
+    # A partitioner holds nothing but its markers and compiled pattern, none
+    # of which change once it is built, so one may be shared by any number
+    # of threads partitioning at once.
+
+    # "regex" compiles the marker set into a single alternation and jumps
+    # between matches; "scan" steps through the markup one character at a
+    # time. Both engines produce identical tokens.
+    engines = ("regex", "scan")
+
+    def __init__(self, escape, *markers, **kwargs):
+        engine = kwargs.pop("engine", "regex")
+        if kwargs:
+            raise TypeError("Unexpected keyword arguments: " + ", ".join(kwargs))
+        if engine not in self.engines:
+            raise ValueError("Unknown partitioner engine {0!r}".format(engine))
+        self.engine = engine
         self.escape = escape
         if escape:
-            self.markers = [self.escape]
+            self.markers = (escape,) + markers
+        else:
+            self.markers = markers
+        self.marker_chars = frozenset(marker[0] for marker in self.markers)
+        self.pattern = self._compile()
+
+    def _compile(self):
+        # Python's alternation is ordered, so listing the markers in their
+        # declared order reproduces the first-match rule of the scan engine.
+        markers = "|".join(re.escape(marker) for marker in self.markers)
+        if not markers:
+            return re.compile("(?!)")
+        elif self.escape and len(self.escape) == 1:
+            escape = re.escape(self.escape)
+            return re.compile("{0}(?:{1})|(?!{0})(?:{1})".format(escape, markers))
         else:
-            self.markers = []
-        self.markers.extend(markers)
-        self.marker_chars = list(set(marker[0] for marker in self.markers))
+            return re.compile(markers)
 
     def partition(self, markup):
-        self.tokens = []
+        if self.engine == "scan":
+            return self._scan(markup)
+        else:
+            return self._search(markup)
+
+    def _search(self, markup):
+        p = 0
+        for match in self.pattern.finditer(markup):
+            q, end = match.span()
+            if q > p:
+                yield markup[p:q]
+            yield markup[q:end]
+            p = end
+        if len(markup) > p:
+            yield markup[p:]
+
+    def _scan(self, markup):
         p, q = 0, 0
         while q < len(markup):
             if markup[q] in self.marker_chars:
@@ -308,100 +474,442 @@ class Partitioner(object):
             yield markup[p:q]
 
 
-class InlineMarkup(object):
+class TokenStream(object):
 
-    def __init__(self, markup=None):
-        partitioner = Partitioner("~",
-            "http://", "https://", "ftp://", "mailto:",
-            '"""', "{{{", "}}}", "<--", "-->",
-            "\\\\", "{{", "}}", "``", '""',
-            "**", "//", "^^", ",,", "[[", "]]", "|"
-        )
-        self.tokens = list(partitioner.partition(markup))
+    __slots__ = ("tokens", "position")
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def __len__(self):
+        return len(self.tokens) - self.position
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        else:
+            return None
+
+    def advance(self):
+        if self.position >= len(self.tokens):
+            raise ValueError("No more tokens")
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def consume_until(self, *end_tokens):
+        # returns the tokens before the first end token along with the end
+        # token itself, which is None if the stream runs out first
+        tokens, p = self.tokens, self.position
+        for q in range(p, len(tokens)):
+            if tokens[q] in end_tokens:
+                self.position = q + 1
+                return tokens[p:q], tokens[q]
+        self.position = len(tokens)
+        return tokens[p:], None
+
+
+def unescape(tokens):
+    return "".join(token[1:] if token[0] == "~" else token for token in tokens)
+
+
+def image(out, markup):
+    src, alt = markup.partition("|")[0::2]
+    out.tag("img", {"src": src, "alt": alt or None})
 
-    def __html__(self):
 
-        def image(out, markup):
-            src, alt = markup.partition("|")[0::2]
-            out.tag("img", {"src": src, "alt": alt or None})
-
-        def auto_link(text):
-            out = HTMLOutputStream()
-            bits = URL.split(text)
-            out.write_text(bits[0])
-            p = 1
-            while p < len(bits):
-                url = bits[p]
-                out.element("a", {"href": url}, text=url)
-                p += 5
-                out.write_text(bits[p])
-                p += 1
-            return out.__html__()
-
-        simple_tokens = {
-            "\\\\": "<br>",
-            "-->": "&rarr;",
-            "<--": "&larr;",
-        }
-        toggle_tokens = {
-            "//": "em",
-            '""': "q",
-            "**": "strong",
-            ",,": "sub",
-            "^^": "sup",
-        }
-        bracket_tokens = {
-            "``" : ("``", lambda out, markup: out.element("code", text=markup)),
-            "{{" : ("}}", image),
-            "{{{": ("}}}", lambda out, markup: out.write_text(markup)),
-        }
+# Inline token handlers are called as handler(out, tokens, token) with the
+# output stream, the TokenStream the token was taken from and the token.
 
+def simple_token(html):
+    def write(out, tokens, token):
+        out.write_html(html)
+    return write
+
+
+def toggle_token(tag):
+    def toggle(out, tokens, token):
+        if tag in out.stack:
+            out.end_tag(tag)
+        else:
+            out.start_tag(tag)
+    return toggle
+
+
+def bracket_token(end_token, writer):
+    # the tokens up to `end_token` are unescaped and passed to the writer
+    def bracket(out, tokens, token):
+        markup, token = tokens.consume_until(end_token)
+        writer(out, unescape(markup))
+    return bracket
+
+
+def link_start(out, tokens, token):
+    href, token = tokens.consume_until("|", "]]")
+    href = unescape(href)
+    out.start_tag("a", {"href": href})
+    if token != "|":
+        out.write_text(href)
+        out.end_tag("a")
+
+
+def link_end(out, tokens, token):
+    try:
+        out.end_tag("a")
+    except ValueError:
+        out.write_text(token)
+
+
+# Pieces of the URL pattern above which can each be matched without
+# backtracking. Under IGNORECASE, [a-z] also matches a few non-ASCII letters
+# which fold to ASCII ones.
+URL_LETTERS = frozenset(string.ascii_letters + u"\u0130\u0131\u017f\u212a")
+URL_SCHEME_CHARS = URL_LETTERS | frozenset(string.digits + "%")
+URL_NON_FINAL_CHARS = frozenset(u"`!()[]{};:'\".,<>?«»“”‘’")
+URL_START = re.compile(r"(?i)\b[a-z0-9.\-]")
+URL_SCHEME = re.compile(r"[\w-]*")
+URL_HOST = re.compile(r"(?i)[a-z0-9.\-]*")
+URL_GROUP = re.compile(r"\((?:[^\s()<>]|\([^\s()<>]+\))*\)")
+URL_BODY = re.compile(r"(?:[^\s()<>]+|\((?:[^\s()<>]|\([^\s()<>]+\))*\))*")
+URL_WWW = re.compile(r"(?i)www\d{0,3}[.]")
+URL_WORD = re.compile(r"(?<!\S)\S*?(?:[:/]|[wW]{3}\d{0,3}[.])\S*")
+
+
+def url_end(word, body):
+    # The body of a URL is a run of characters and parenthesised groups
+    # followed by a group or a character which can end a URL. The longest
+    # run is found first, then any characters which cannot end a URL are
+    # dropped from the end of it.
+    stop = URL_BODY.match(word, body).end()
+    if stop == body:
+        return None
+    if word[body] == "(":
+        first = URL_GROUP.match(word, body).end()
+    else:
+        first = body + 1
+    end = stop
+    while end > first:
+        ch = word[end - 1]
+        if ch == ")" or ch not in URL_NON_FINAL_CHARS:
+            return end
+        end -= 1
+    return None
+
+
+def url_spans(word):
+    # Finds the same URLs in a word without whitespace as URL.finditer, but
+    # in linear time. Starts which share the end of a scheme or host run
+    # share a body, so each body is only measured once.
+    n = len(word)
+    spans = []
+    ends = {}
+    scheme = host = (0, 0)
+    match = URL_START.search(word)
+    while match:
+        i = match.start()
+        ch = word[i]
+        body = None
+        if ch in URL_LETTERS and i + 1 < n:
+            if not scheme[0] <= i + 1 < scheme[1]:
+                scheme = (i + 1, URL_SCHEME.match(word, i + 1).end())
+            j = scheme[1]
+            if j > i + 1 and j + 1 < n and word[j] == ":" and (word[j + 1] == "/" or word[j + 1] in URL_SCHEME_CHARS):
+                body = j + 2
+        if body is None and ch in "wW":
+            www = URL_WWW.match(word, i)
+            if www:
+                body = www.end()
+        if body is None:
+            if not host[0] <= i < host[1]:
+                host = (i, URL_HOST.match(word, i).end())
+            j = host[1]
+            if j < n and word[j] == "/":
+                for k in (2, 3, 4):
+                    dot = j - k - 1
+                    if dot <= i:
+                        break
+                    if word[dot] == "." and all(c in URL_LETTERS for c in word[dot + 1:j]):
+                        body = j + 1
+                        break
+        if body is not None and body < n:
+            if body not in ends:
+                ends[body] = url_end(word, body)
+            end = ends[body]
+            if end is not None:
+                spans.append((i, end))
+                match = URL_START.search(word, end)
+                continue
+        match = URL_START.search(word, i + 1)
+    return spans
+
+
+def find_urls(text):
+    # Yields the (start, end) span of each URL in the text. A URL never
+    # spans whitespace and has a ':', a '/' or a 'www.' in it, so only words
+    # with one of those are searched.
+    if ":" not in text and "/" not in text and not URL_WWW.search(text):
+        return
+    for match in URL_WORD.finditer(text):
+        offset = match.start()
+        for start, end in url_spans(match.group()):
+            yield offset + start, offset + end
+
+
+def auto_link(text):
+    html = []
+    p = 0
+    for start, end in find_urls(text):
+        url = HTML.entities(text[start:end])
+        html.append(HTML.entities(text[p:start]))
+        html.append('<a href="{0}">{0}</a>'.format(url))
+        p = end
+    if not html:
+        return HTML.entities(text)
+    html.append(HTML.entities(text[p:]))
+    return "".join(html)
+
+
+class InlineCache(object):
+
+    def __init__(self, max_entries=4096, max_bytes=4194304):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def _size(markup, html):
+        return sys.getsizeof(markup) + sys.getsizeof(html)
+
+    def get(self, markup):
+        with self.lock:
+            try:
+                html = self.entries.pop(markup)
+            except KeyError:
+                self.misses += 1
+                return None
+            else:
+                self.entries[markup] = html
+                self.hits += 1
+                return html
+
+    def put(self, markup, html):
+        size = self._size(markup, html)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if markup in self.entries:
+                self.bytes -= self._size(markup, self.entries.pop(markup))
+            self.entries[markup] = html
+            self.bytes += size
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                old_markup, old_html = self.entries.popitem(last=False)
+                self.bytes -= self._size(old_markup, old_html)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "bytes": self.bytes,
+            }
+
+
+class TokenRegistry(object):
+
+    # The inline tokens of a dialect, each marker with the handler which
+    # renders it or None for a marker which is only kept whole, such as
+    # "http://", whose "//" must not start emphasis; along with the kinds of
+    # line which may start a block. A Grammar compiles a registry into one
+    # partitioner and one dispatch table, so tokens may be added or removed
+    # freely at no cost to rendering, and fewer tokens render faster:
+    #
+    #     registry = TokenRegistry.default()
+    #     registry.remove("{{", "}}")
+    #     registry.remove_block(ROW_LINE)
+    #     registry.add_toggle("__", "u")
+    #     comments = Grammar(registry=registry)
+
+    def __init__(self, escape="~"):
+        self.escape = escape
+        self.tokens = OrderedDict()
+        self.line_starts = dict(LINE_STARTS)
+
+    @classmethod
+    def from_tables(cls, grammar):
+        # a registry of the tokens declared in the tables of a grammar
+        # class or instance
+        registry = cls()
+        for marker in grammar.inline_markers:
+            if marker in grammar.simple_tokens:
+                registry.add_simple(marker, grammar.simple_tokens[marker])
+            elif marker in grammar.toggle_tokens:
+                registry.add_toggle(marker, grammar.toggle_tokens[marker])
+            elif marker in grammar.bracket_tokens:
+                registry.add_bracket(marker, *grammar.bracket_tokens[marker])
+            elif marker == "[[":
+                registry.add(marker, link_start)
+            elif marker == "]]":
+                registry.add(marker, link_end)
+            else:
+                registry.add(marker)
+        return registry
+
+    @classmethod
+    def default(cls):
+        return cls.from_tables(Grammar)
+
+    def copy(self):
+        registry = TokenRegistry(self.escape)
+        registry.tokens.update(self.tokens)
+        registry.line_starts = dict(self.line_starts)
+        return registry
+
+    def __contains__(self, marker):
+        return marker in self.tokens
+
+    def add(self, marker, handler=None):
+        if not marker or marker.startswith(self.escape):
+            raise ValueError("Invalid token marker {0!r}".format(marker))
+        self.tokens[marker] = handler
+
+    def add_simple(self, marker, html):
+        self.add(marker, simple_token(html))
+
+    def add_toggle(self, marker, tag):
+        self.add(marker, toggle_token(tag))
+
+    def add_bracket(self, marker, end_marker, writer):
+        self.add(marker, bracket_token(end_marker, writer))
+        if end_marker not in self.tokens:
+            self.add(end_marker)
+
+    def remove(self, *markers):
+        for marker in markers:
+            try:
+                del self.tokens[marker]
+            except KeyError:
+                raise ValueError("No token {0!r} to remove".format(marker))
+
+    def remove_block(self, kind):
+        # lines which would have started a block of this kind become text
+        for first, (line_kind, _) in list(self.line_starts.items()):
+            if line_kind == kind:
+                del self.line_starts[first]
+
+    def markers(self):
+        # longest first, so that a marker is never cut short by another
+        # which starts it, whatever order they were added in
+        return sorted(self.tokens, key=len, reverse=True)
+
+    def partitioner(self):
+        return Partitioner(self.escape, *self.markers())
+
+    def handlers(self):
+        return dict((marker, handler) for marker, handler in self.tokens.items() if handler)
+
+
+class Grammar(object):
+
+    inline_markers = (
+        "http://", "https://", "ftp://", "mailto:",
+        '"""', "{{{", "}}}", "<--", "-->",
+        "\\\\", "{{", "}}", "``", '""',
+        "**", "//", "^^", ",,", "[[", "]]", "|",
+    )
+
+    simple_tokens = {
+        "\\\\": "<br>",
+        "-->": "&rarr;",
+        "<--": "&larr;",
+    }
+
+    toggle_tokens = {
+        "//": "em",
+        '""': "q",
+        "**": "strong",
+        ",,": "sub",
+        "^^": "sup",
+    }
+
+    bracket_tokens = {
+        "``" : ("``", lambda out, markup: out.element("code", text=markup)),
+        "{{" : ("}}", image),
+        "{{{": ("}}}", lambda out, markup: out.write_text(markup)),
+    }
+
+    table_row_markers = ("|", "``", "[[", "]]", "{{", "}}", "{{{", "}}}")
+
+    table_row_bracket_tokens = {
+        "``" : "``",
+        "[[" : "]]",
+        "{{" : "}}",
+        "{{{": "}}}",
+    }
+
+    def __init__(self, inline_cache=None, registry=None):
+        # The token tables are frozen in read-only copies so that a grammar
+        # can be shared between threads; the inline cache has its own lock.
+        # Inline tokens are rendered from `registry`, or else from the
+        # tables, compiled into a partitioner and a dispatch table.
+        self.simple_tokens = MappingProxyType(dict(self.simple_tokens))
+        self.toggle_tokens = MappingProxyType(dict(self.toggle_tokens))
+        self.bracket_tokens = MappingProxyType(dict(self.bracket_tokens))
+        self.table_row_bracket_tokens = MappingProxyType(dict(self.table_row_bracket_tokens))
+        if registry is None:
+            registry = TokenRegistry.from_tables(self)
+        self.inline_partitioner = registry.partitioner()
+        self.inline_handlers = MappingProxyType(registry.handlers())
+        self.line_starts = MappingProxyType(dict(registry.line_starts))
+        self.table_row_partitioner = Partitioner("~", *self.table_row_markers)
+        self.inline_cache = inline_cache
+
+    def render_inline(self, markup):
+        cache = self.inline_cache
+        if cache is None:
+            return InlineMarkup(markup, self).__html__()
+        html = cache.get(markup)
+        if html is None:
+            html = InlineMarkup(markup, self).__html__()
+            cache.put(markup, html)
+        return html
+
+
+class InlineMarkup(object):
+
+    __slots__ = ("grammar", "tokens")
+
+    def __init__(self, markup=None, grammar=None):
+        self.grammar = grammar or DEFAULT_GRAMMAR
+        self.tokens = list(self.grammar.inline_partitioner.partition(markup))
+
+    def __html__(self):
+        handlers = self.grammar.inline_handlers
         out = HTMLOutputStream(processor=auto_link)
-        tokens = self.tokens[:]
+        tokens = TokenStream(self.tokens)
         while tokens:
-            token = tokens.pop(0)
-            if token[0] == "~":
+            token = tokens.advance()
+            handler = handlers.get(token)
+            if handler is not None:
+                handler(out, tokens, token)
+            elif token[0] == "~":
                 out.write_text(token[1:])
-            elif token in simple_tokens:
-                out.write_html(simple_tokens[token])
-            elif token in toggle_tokens:
-                tag = toggle_tokens[token]
-                if tag in out.stack:
-                    out.end_tag(tag)
-                else:
-                    out.start_tag(tag)
-            elif token in bracket_tokens:
-                end_token, writer = bracket_tokens[token]
-                markup = []
-                while tokens:
-                    token = tokens.pop(0)
-                    if token == end_token:
-                        break
-                    elif token[0] == "~":
-                        markup.append(token[1:])
-                    else:
-                        markup.append(token)
-                writer(out, "".join(markup))
-            elif token == "[[":
-                href = []
-                while tokens:
-                    token = tokens.pop(0)
-                    if token in ("|", "]]"):
-                        break
-                    elif token[0] == "~":
-                        href.append(token[1:])
-                    else:
-                        href.append(token)
-                href = "".join(href)
-                out.start_tag("a", {"href": href})
-                if token != "|":
-                    out.write_text(href)
-                    out.end_tag("a")
-            elif token == "]]":
-                try:
-                    out.end_tag("a")
-                except ValueError:
-                    out.write_text(token)
             else:
                 out.write_text(token, post_process=True)
         out.close()
@@ -410,17 +918,22 @@ class InlineMarkup(object):
 
 class HeadingMarkup(object):
 
+    __slots__ = ("level", "text")
+
     def __init__(self, markup):
         if not markup.startswith("="):
             raise ValueError("Heading must start with '='")
-        chars = list(markup)
-        self.level = 0
-        while chars and chars[0] == "=":
-            chars.pop(0)
-            self.level += 1
-        self.text = "".join(chars).strip().rstrip("=").rstrip()
-        if self.level > 6:
-            self.level = 6
+        text = markup.lstrip("=")
+        self.level = min(len(markup) - len(text), 6)
+        self.text = text.strip().rstrip("=").rstrip()
+
+    @classmethod
+    def from_parts(cls, level, text):
+        # for a heading already taken apart by the block lexer
+        markup = cls.__new__(cls)
+        markup.level = level
+        markup.text = text
+        return markup
 
     def __html__(self):
         out = HTMLOutputStream()
@@ -430,6 +943,8 @@ class HeadingMarkup(object):
 
 class HorizontalRuleMarkup(object):
 
+    __slots__ = ()
+
     def __init__(self, markup):
         if not markup.startswith("----"):
             raise ValueError("Horizontal rule must start with '----'")
@@ -442,16 +957,30 @@ class HorizontalRuleMarkup(object):
 
 class ListItemMarkup(object):
 
-    def __init__(self, markup):
+    __slots__ = ("signature", "level", "text", "grammar")
+
+    def __init__(self, markup, grammar=None):
         if not (markup.startswith("#") or markup.startswith("*")):
             raise ValueError("List items must start with either '#' or '*'")
-        chars = list(markup)
-        self.signature = []
-        while chars and chars[0] in ("#", "*"):
-            self.signature.append(chars.pop(0))
-        self.signature = tuple(self.signature)
-        self.level = len(self.signature)
-        self.item = InlineMarkup("".join(chars).strip())
+        text = markup.lstrip("#*")
+        self.level = len(markup) - len(text)
+        self.signature = markup[:self.level]
+        self.text = text.strip()
+        self.grammar = grammar or DEFAULT_GRAMMAR
+
+    @classmethod
+    def from_parts(cls, signature, text, grammar=None):
+        # for a list item already taken apart by the block lexer
+        markup = cls.__new__(cls)
+        markup.signature = signature
+        markup.level = len(signature)
+        markup.text = text
+        markup.grammar = grammar or DEFAULT_GRAMMAR
+        return markup
+
+    @property
+    def item(self):
+        return InlineMarkup(self.text, self.grammar)
 
     def ordered(self, level):
         return self.signature[level] == "#"
@@ -468,12 +997,14 @@ class ListItemMarkup(object):
 
     def __html__(self):
         out = HTMLOutputStream()
-        out.element("li", html=self.item.__html__())
+        out.element("li", html=self.grammar.render_inline(self.text))
         return out.__html__()
 
 
 class PreformattedMarkup(object):
 
+    __slots__ = ("text",)
+
     def __init__(self, markup):
         self.text = markup
 
@@ -485,6 +1016,8 @@ class PreformattedMarkup(object):
 
 class LineOfCodeMarkup(object):
 
+    __slots__ = ("line",)
+
     def __init__(self, markup):
         self.line = markup
 
@@ -498,37 +1031,39 @@ class LineOfCodeMarkup(object):
 
 class TableRowMarkup(object):
 
-    def __init__(self, markup):
+    # cells are only split out of the row when it is rendered, so a parsed
+    # table holds no more than the text of each row
+    __slots__ = ("markup", "grammar")
+
+    def __init__(self, markup, grammar=None):
         if not markup.startswith("|"):
             raise ValueError("Table row must start with '|'")
-        bracket_tokens = {
-            "``" : "``",
-            "[[" : "]]",
-            "{{" : "}}",
-            "{{{": "}}}",
-            }
-        partitioner = Partitioner("~", "|", "``", "[[", "]]", "{{", "}}", "{{{", "}}}")
-        markup = markup.rstrip()
+        self.markup = markup.rstrip()
+        self.grammar = grammar or DEFAULT_GRAMMAR
+
+    @property
+    def cells(self):
+        bracket_tokens = self.grammar.table_row_bracket_tokens
+        partitioner = self.grammar.table_row_partitioner
+        markup = self.markup
         if markup.endswith("|"):
-            tokens = list(partitioner.partition(markup[:-1]))
+            tokens = TokenStream(list(partitioner.partition(markup[:-1])))
         else:
-            tokens = list(partitioner.partition(markup))
-        self.cells = []
+            tokens = TokenStream(list(partitioner.partition(markup)))
+        cells = []
         while tokens:
-            token = tokens.pop(0)
+            token = tokens.advance()
             if token == "|":
-                self.cells.append([])
+                cells.append([])
             elif token in bracket_tokens:
-                end = bracket_tokens[token]
-                self.cells[-1].append(token)
-                while tokens:
-                    token = tokens.pop(0)
-                    self.cells[-1].append(token)
-                    if token == end:
-                        break
+                cells[-1].append(token)
+                content, end = tokens.consume_until(bracket_tokens[token])
+                cells[-1].extend(content)
+                if end:
+                    cells[-1].append(end)
             else:
-                self.cells[-1].append(token)
-        self.cells = ["".join(cell) for cell in self.cells]
+                cells[-1].append(token)
+        return ["".join(cell) for cell in cells]
 
     def __html__(self):
         out = HTMLOutputStream()
@@ -552,19 +1087,26 @@ class TableRowMarkup(object):
                     align = "right"
             if align:
                 content = content.strip()
-                out.element(tag, {"style": "text-align:" + align}, html=InlineMarkup(content).__html__())
+                out.element(tag, {"style": "text-align:" + align}, html=self.grammar.render_inline(content))
             else:
-                out.element(tag, html=InlineMarkup(content).__html__())
+                out.element(tag, html=self.grammar.render_inline(content))
         out.end_tag("tr")
         return out.__html__()
 
 
 class Block(object):
 
-    def __init__(self, content_type=None, params=None, lines=None):
+    # A block may be yielded before it is complete, with no `end`; the rest
+    # of its lines then follow in blocks which are marked as `continued`.
+    __slots__ = ("content_type", "params", "lines", "start", "end", "continued")
+
+    def __init__(self, content_type=None, params=None, lines=None, start=None, end=None, continued=False):
         self.content_type = content_type
         self.params = params
         self.lines = []
+        self.start = start
+        self.end = end
+        self.continued = continued
         if lines:
             for line in lines:
                 self.append(line)
@@ -581,114 +1123,890 @@ class Block(object):
         else:
             raise ValueError("Cannot add {0} to block of {1}".format(line.__class__.__name__, self.content_type.__name__))
 
+    def close(self, end):
+        # preformatted and code blocks keep their text as a single span
+        if self.content_type in (PreformattedMarkup, LineOfCodeMarkup) and len(self.lines) > 1:
+            self.lines = ["".join(self.lines)]
+        self.end = end
+        return self
+
+
+def lines_of(source):
+    if isinstance(source, string_types):
+        for line in source.splitlines(True):
+            yield line
+    else:
+        # split each incoming chunk exactly as a whole document would be
+        # split, carrying any unterminated tail over to the next chunk, as
+        # well as a final "\r" which may be the start of a "\r\n"
+        pending = ""
+        for chunk in source:
+            if pending:
+                chunk = pending + chunk
+                pending = ""
+            lines = chunk.splitlines(True)
+            if lines and (lines[-1].endswith("\r") or lines[-1].splitlines()[0] == lines[-1]):
+                pending = lines.pop()
+            for line in lines:
+                yield line
+        if pending:
+            yield pending
+
+
+def read_chunks(path, chunk_size=1048576, encoding="utf-8"):
+    # Decodes a file a chunk at a time from a read-only memory map, so that
+    # neither its bytes nor its text are ever held in full. Pages already
+    # decoded are dropped from the map where the platform allows, which
+    # keeps the resident size bounded even for files larger than memory.
+    chunk_size = max(mmap.ALLOCATIONGRANULARITY,
+                     chunk_size - chunk_size % mmap.ALLOCATIONGRANULARITY)
+    decoder = codecs.getincrementaldecoder(encoding)()
+    with open(path, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, EnvironmentError):
+            # empty files, and some special files, cannot be mapped
+            data = None
+        if data is None:
+            for block in iter(lambda: f.read(chunk_size), b""):
+                text = decoder.decode(block)
+                if text:
+                    yield text
+        else:
+            try:
+                if hasattr(data, "madvise"):
+                    data.madvise(mmap.MADV_SEQUENTIAL)
+                for offset in range(0, len(data), chunk_size):
+                    text = decoder.decode(data[offset:offset + chunk_size])
+                    if hasattr(data, "madvise"):
+                        data.madvise(mmap.MADV_DONTNEED, offset, min(chunk_size, len(data) - offset))
+                    if text:
+                        yield text
+            finally:
+                data.close()
+    text = decoder.decode(b"", True)
+    if text:
+        yield text
+
+
+def whole_lines(chunks):
+    # regroups text chunks so that each ends with a "\n", which is always
+    # the end of a line, however any other line breaks around it fall
+    pending = []
+    for chunk in chunks:
+        end = chunk.rfind("\n") + 1
+        if not end:
+            pending.append(chunk)
+            continue
+        pending.append(chunk[:end])
+        yield "".join(pending)
+        pending = [chunk[end:]] if end < len(chunk) else []
+    if pending:
+        yield "".join(pending)
+
+
+# The kinds of line told apart by the block lexer. Lines within a fenced
+# block are never classified; they are passed on as they are, and only the
+# line closing the fence is picked out.
+TEXT_LINE = "text"
+HEADING_LINE = "heading"
+RULE_LINE = "rule"
+ITEM_LINE = "item"
+PRE_LINE = "pre"
+CODE_LINE = "code"
+ROW_LINE = "row"
+FENCED_LINE = "fenced"
+FENCE_END_LINE = "fence end"
+
+# The kind of line each first character may start, and the marker the line
+# must start with to be of that kind; the marker of a fence also closes it.
+# Any other line is text, unless it is indented, in which case it may yet
+# be a list item if it starts as one would.
+LINE_STARTS = {
+    "=": (HEADING_LINE, "="),
+    "-": (RULE_LINE, "----"),
+    "#": (ITEM_LINE, "#"),
+    "*": (ITEM_LINE, "*"),
+    "{": (PRE_LINE, "{{{"),
+    "`": (CODE_LINE, "```"),
+    "|": (ROW_LINE, "|"),
+}
+FENCE_ENDS = {PRE_LINE: "}}}", CODE_LINE: "```"}
+
+
+def block_lines(lines, line_starts=None):
+    # Classifies each line in a single pass, yielding a (kind, level,
+    # payload) record for it. The level is that of a heading or list item
+    # and the payload is, for a heading, its text; for a list item, the
+    # line without indent; for a fence, its parameters; and otherwise the
+    # line itself, with trailing whitespace removed unless fenced. Lines
+    # are told apart by `line_starts`, LINE_STARTS unless a grammar says.
+    fence = None
+    starts = (LINE_STARTS if line_starts is None else line_starts).get
+    for line in lines:
+        if fence:
+            if line.startswith(fence):
+                fence = None
+                yield FENCE_END_LINE, 0, line
+            else:
+                yield FENCED_LINE, 0, line
+            continue
+        line = line.rstrip()
+        first = line[:1]
+        start = starts(first)
+        if start and line.startswith(start[1]):
+            kind, marker = start
+            if kind is ROW_LINE:
+                yield ROW_LINE, 0, line
+            elif kind is ITEM_LINE:
+                yield ITEM_LINE, len(line) - len(line.lstrip("#*")), line
+            elif kind is HEADING_LINE:
+                text = line.lstrip("=")
+                yield HEADING_LINE, min(len(line) - len(text), 6), text.strip().rstrip("=").rstrip()
+            elif kind is RULE_LINE:
+                yield RULE_LINE, 0, line
+            else:
+                fence = FENCE_ENDS[kind]
+                yield kind, 0, line.lstrip(marker[0]).strip().split()
+        elif first.isspace():
+            stripped = line.lstrip()
+            start = starts(stripped[:1])
+            if start and start[0] is ITEM_LINE:
+                yield ITEM_LINE, len(stripped) - len(stripped.lstrip("#*")), stripped
+            else:
+                yield TEXT_LINE, 0, line
+        else:
+            yield TEXT_LINE, 0, line
+
 
-class Markup(object):
+class BlockParser(object):
 
-    def __init__(self, markup):
-        self.blocks = []
+    def __init__(self, grammar=None):
+        self.grammar = grammar or DEFAULT_GRAMMAR
         self.title = None
-        title_level = 7
+        self.title_level = 7
+
+    def parse(self, lines, first_line=0, table_rows=None):
+        # each block records the span of line numbers it was parsed from:
+        # `start` is its first line and `end` the line which closed it, or
+        # the line after a closing fence; with `table_rows`, tables are
+        # yielded that many rows at a time rather than held in full
         block = Block()
-        for line in markup.splitlines(True):
-            if block.content_type is PreformattedMarkup:
-                if line.startswith("}}}"):
-                    self.append(block)
+        i = first_line
+        for i, (kind, level, payload) in enumerate(block_lines(lines, self.grammar.line_starts), first_line):
+            if kind is FENCED_LINE:
+                block.lines.append(payload)
+            elif kind is TEXT_LINE:
+                if block.content_type is not None:
+                    if block.lines:
+                        yield block.close(i)
                     block = Block()
-                else:
-                    block.lines.append(PreformattedMarkup(line))
-            elif block.content_type is LineOfCodeMarkup:
-                if line.startswith("```"):
-                    self.append(block)
+                if payload:
+                    if not block.lines:
+                        block.start = i
+                    block.lines.append(payload)
+                elif block.lines:
+                    yield block.close(i)
                     block = Block()
+            elif kind is ROW_LINE:
+                if block.content_type is not TableRowMarkup:
+                    if block.lines:
+                        yield block.close(i)
+                    block = Block(TableRowMarkup, start=i)
+                elif table_rows and len(block.lines) >= table_rows:
+                    yield block
+                    block = Block(TableRowMarkup, start=i, continued=True)
+                block.lines.append(TableRowMarkup(payload, self.grammar))
+            elif kind is ITEM_LINE:
+                signature = payload[:level]
+                if block.content_type is ListItemMarkup and block.lines:
+                    # as ListItemMarkup.compatible: one signature starts the other
+                    first = block.lines[0].signature
+                    compatible = first.startswith(signature) or signature.startswith(first)
                 else:
-                    block.lines.append(LineOfCodeMarkup(line))
+                    compatible = False
+                markup = ListItemMarkup.from_parts(signature, payload[level:].strip(), self.grammar)
+                if not compatible:
+                    if block.lines:
+                        yield block.close(i)
+                    block = Block(ListItemMarkup, start=i)
+                block.lines.append(markup)
+            elif kind is HEADING_LINE:
+                if block.lines:
+                    yield block.close(i)
+                block = Block()
+                if not self.title or level < self.title_level:
+                    self.title, self.title_level = payload, level
+                heading = Block(HeadingMarkup, start=i, end=i + 1)
+                heading.lines.append(HeadingMarkup.from_parts(level, payload))
+                yield heading
+            elif kind is FENCE_END_LINE:
+                if block.lines:
+                    yield block.close(i + 1)
+                block = Block()
+            elif kind is RULE_LINE:
+                if block.lines:
+                    yield block.close(i)
+                block = Block()
+                rule = Block(HorizontalRuleMarkup, start=i, end=i + 1)
+                rule.lines.append(HorizontalRuleMarkup(payload))
+                yield rule
             else:
-                line = line.rstrip()
-                stripped_line = line.lstrip()
-                if line.startswith("="):
-                    self.append(block)
-                    block = Block()
-                    markup = HeadingMarkup(line)
-                    self.blocks.append(Block(HeadingMarkup, lines=[markup]))
-                    if not self.title or markup.level < title_level:
-                        self.title, title_level = markup.text, markup.level
-                elif line.startswith("----"):
-                    self.append(block)
-                    block = Block()
-                    self.blocks.append(Block(HorizontalRuleMarkup, lines=[HorizontalRuleMarkup(line)]))
-                elif stripped_line.startswith("#") or stripped_line.startswith("*"):
-                    markup = ListItemMarkup(stripped_line)
-                    if not (block and block.content_type is ListItemMarkup and block.lines[0].compatible(markup)):
-                        self.append(block)
-                        block = Block(ListItemMarkup)
-                    block.lines.append(markup)
-                elif line.startswith("{{{"):
-                    params = line.lstrip("{").strip().split()
-                    self.append(block)
-                    block = Block(PreformattedMarkup, params=params)
-                elif line.startswith("```"):
-                    params = line.lstrip("`").strip().split()
-                    self.append(block)
-                    block = Block(LineOfCodeMarkup, params=params)
-                elif line.startswith("|"):
-                    if not block.content_type is TableRowMarkup:
-                        self.append(block)
-                        block = Block(TableRowMarkup)
-                    block.lines.append(TableRowMarkup(line))
-                else:
-                    if block.content_type is not None:
-                        self.append(block)
-                        block = Block()
-                    if line:
-                        block.lines.append(line)
-                    else:
-                        if block:
-                            self.blocks.append(block)
-                            block = Block()
-        self.append(block)
+                if block.lines:
+                    yield block.close(i)
+                content_type = PreformattedMarkup if kind is PRE_LINE else LineOfCodeMarkup
+                block = Block(content_type, params=payload, start=i)
+        if block.lines:
+            yield block.close(i + 1)
+
+
+# Lines which can start a heading or open or close a fenced block, and line
+# breaks other than "\n" and "\r\n" which str.splitlines also breaks on.
+OUTLINE_MARKERS = ("=", "{{{", "```", "}}}")
+OUTLINE_LINES = re.compile(r"\n(?:=|\{\{\{|```|\}\}\})")
+OTHER_LINE_BREAKS = u"\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+
+
+def only_newlines(text):
+    # true if "\n" is the only line break used, alone or after a "\r"
+    return (not any(ch in text for ch in OTHER_LINE_BREAKS) and
+            ("\r" not in text or text.count("\r") == text.count("\r\n")))
+
+
+def marked_lines(source):
+    if not isinstance(source, string_types):
+        # a stream is scanned as runs of whole lines, each as a document
+        i = 0
+        for text in whole_lines(source):
+            for j, line in marked_lines(text):
+                yield i + j, line
+            i += text.count("\n") if only_newlines(text) else len(text.splitlines())
+    elif only_newlines(source):
+        # only "\n" can end a line, so there is no need to split the others
+        starts = (match.start() + 1 for match in OUTLINE_LINES.finditer(source))
+        if source.startswith(OUTLINE_MARKERS):
+            starts = chain([0], starts)
+        i = p = 0
+        for start in starts:
+            i += source.count("\n", p, start)
+            p = start
+            end = source.find("\n", start)
+            yield i, source[start:] if end < 0 else source[start:end + 1]
+    else:
+        for i, line in enumerate(source.splitlines(True)):
+            if line.startswith(OUTLINE_MARKERS):
+                yield i, line
+
+
+def outline(source):
+    # Returns the title of a document, as Markup.title would give it, and a
+    # list of its headings as (level, text, line number) tuples. Only lines
+    # which could be headings or fences are looked at, so this is much
+    # faster than a full parse. Line numbers count from zero, as for blocks.
+    title, title_level = None, 7
+    headings = []
+    fence = None
+    for i, line in marked_lines(source):
+        if fence:
+            if line.startswith(fence):
+                fence = None
+        elif line.startswith("="):
+            heading = HeadingMarkup(line.rstrip())
+            headings.append((heading.level, heading.text, i))
+            if not title or heading.level < title_level:
+                title, title_level = heading.text, heading.level
+        elif line.startswith("{{{"):
+            fence = "}}}"
+        elif line.startswith("```"):
+            fence = "```"
+    return title, headings
+
+
+def write_block(out, block, grammar=None):
+    if block.content_type is None:
+        grammar = grammar or DEFAULT_GRAMMAR
+        out.element("p", html=grammar.render_inline(" ".join(block.lines)))
+    elif block.content_type in (HeadingMarkup, HorizontalRuleMarkup):
+        for line in block.lines:
+            out.write_html(line.__html__())
+    elif block.content_type in (LineOfCodeMarkup, PreformattedMarkup):
+        if block.params:
+            out.start_tag("pre", {"class": " ".join(block.params)})
+        else:
+            out.start_tag("pre")
+        text = HTML.entities("".join(block.lines))
+        if block.content_type is LineOfCodeMarkup:
+            out.start_tag("ol")
+            out.write_html("<li><code>" + "</code></li><li><code>".join(text.splitlines(True)) + "</code></li>")
+        else:
+            out.write_html(text)
+        out.end_tag("pre")
+    elif block.content_type is ListItemMarkup:
+        level = 0
+        for line in block.lines:
+            while level > line.level:
+                out.end_tag()
+                level -= 1
+            while level < line.level:
+                out.start_tag(line.list_tag(level))
+                level += 1
+            out.write_html(line.__html__())
+        while level:
+            out.end_tag()
+            level -= 1
+    elif block.content_type is TableRowMarkup:
+        if not block.continued:
+            out.start_tag("table", {"cellspacing": 0})
+        for line in block.lines:
+            out.write_html(line.__html__())
+        if block.end is not None:
+            out.end_tag("table")
+
+
+def iter_chunks(write_blocks, chunk_size=None, encoding=None):
+    # `write_blocks` is a generator function which writes to the output
+    # stream it is given, pausing after each block; any chunks the sink has
+    # collected are passed on at each pause
+    sink = IterableSink()
+    out = HTMLOutputStream(sink=sink, chunk_size=chunk_size)
+    for _ in write_blocks(out):
+        for chunk in sink.drain():
+            yield chunk.encode(encoding) if encoding else chunk
+    out.close()
+    for chunk in sink.drain():
+        yield chunk.encode(encoding) if encoding else chunk
+
+
+# A heading and the blocks below it, up to the next heading of the same or
+# a higher level, as a range of block numbers.
+Section = namedtuple("Section", ["level", "title", "start", "stop"])
+
+
+class Markup(object):
+
+    # Blocks may be rendered one at a time or a range at a time, in any
+    # order. With `memoize`, the HTML of each block is kept once rendered.
+
+    rendered = None
+
+    def __init__(self, markup, grammar=None, memoize=False):
+        self.grammar = grammar or DEFAULT_GRAMMAR
+        parser = BlockParser(self.grammar)
+        self.blocks = list(parser.parse(lines_of(markup)))
+        self.title = parser.title
+        if memoize:
+            self.rendered = {}
 
     def append(self, block):
         if block:
             self.blocks.append(block)
+            self.__dict__.pop("_sections", None)
+
+    def __len__(self):
+        dumped_blocks = self.__dict__.get("dumped_blocks")
+        return len(self.blocks if dumped_blocks is None else dumped_blocks)
 
     def __html__(self):
         out = HTMLOutputStream()
+        self.write(out)
+        return out.__html__()
+
+    def _blocks(self, start=0, stop=None):
+        # Blocks which have not been restored since a load are rendered
+        # straight from their dumped state; see _restore_block.
+        dumped_blocks = self.__dict__.get("dumped_blocks")
+        if dumped_blocks is None:
+            return self.blocks[start:stop]
+        return (self._restore_block(dumped) for dumped in dumped_blocks[start:stop])
+
+    def write_blocks(self, out):
+        if self.rendered is not None:
+            for i in range(len(self)):
+                out.write_html(self.render(i))
+                yield
+            return
+        for block in self._blocks():
+            write_block(out, block, self.grammar)
+            yield
+
+    def write(self, out):
+        for _ in self.write_blocks(out):
+            pass
+        out.flush()
+
+    def chunks(self, chunk_size=None, encoding=None):
+        return iter_chunks(self.write_blocks, chunk_size, encoding)
+
+    def render(self, i):
+        # the HTML of block `i`, which may be negative as for a list index
+        count = len(self)
+        if not -count <= i < count:
+            raise IndexError("block index out of range")
+        if i < 0:
+            i += count
+        if self.rendered is None:
+            return self._render_blocks(self._blocks(i, i + 1))
+        html = self.rendered.get(i)
+        if html is None:
+            html = self.rendered[i] = self._render_blocks(self._blocks(i, i + 1))
+        return html
+
+    def render_range(self, start=0, stop=None):
+        # the HTML of the blocks from `start` up to `stop`, as for a slice;
+        # none of the blocks outside the range are rendered
+        if self.rendered is not None:
+            start, stop, _ = slice(start, stop).indices(len(self))
+            return "".join([self.render(i) for i in range(start, stop)])
+        return self._render_blocks(self._blocks(start, stop))
+
+    def _render_blocks(self, blocks):
+        out = HTMLOutputStream()
+        for block in blocks:
+            write_block(out, block, self.grammar)
+        out.flush()
+        return out.__html__()
+
+    def sections(self):
+        # The section index: a Section for each heading, in order, which
+        # runs up to the next heading of the same or a higher level.
+        try:
+            return self._sections
+        except AttributeError:
+            pass
+        dumped_blocks = self.__dict__.get("dumped_blocks")
+        if dumped_blocks is None:
+            headings = [(i, block.lines[0].level, block.lines[0].text) for i, block in enumerate(self.blocks)
+                        if block.content_type is HeadingMarkup]
+        else:
+            headings = [(i, lines[0][0], lines[0][1]) for i, (type_name, _, _, _, lines) in enumerate(dumped_blocks)
+                        if type_name == "HeadingMarkup"]
+        stops = [len(self)] * len(headings)
+        open_sections = []
+        for n, (i, level, _) in enumerate(headings):
+            while open_sections and headings[open_sections[-1]][1] >= level:
+                stops[open_sections.pop()] = i
+            open_sections.append(n)
+        self._sections = [Section(level, text, i, stop) for (i, level, text), stop in zip(headings, stops)]
+        return self._sections
+
+    def render_section(self, n):
+        section = self.sections()[n]
+        return self.render_range(section.start, section.stop)
+
+    # The serialised form is a marshalled tuple of plain values, tagged with
+    # a format version which must be bumped whenever the block or line
+    # classes change shape.
+    dump_version = 2
+
+    line_types = dict((cls.__name__, cls) for cls in (
+        HeadingMarkup, HorizontalRuleMarkup, ListItemMarkup,
+        PreformattedMarkup, LineOfCodeMarkup, TableRowMarkup,
+    ))
+
+    def dump(self):
+        blocks = []
         for block in self.blocks:
             if block.content_type is None:
-                out.element("p", html=InlineMarkup(" ".join(block.lines)).__html__())
-            elif block.content_type in (HeadingMarkup, HorizontalRuleMarkup):
-                for line in block.lines:
-                    out.write_html(line.__html__())
-            elif block.content_type in (LineOfCodeMarkup, PreformattedMarkup):
-                if block.params:
-                    out.start_tag("pre", {"class": " ".join(block.params)})
+                blocks.append((None, block.params, block.start, block.end, block.lines))
+            elif block.content_type in (PreformattedMarkup, LineOfCodeMarkup):
+                blocks.append((block.content_type.__name__, block.params, block.start, block.end, block.lines))
+            else:
+                slots = [slot for slot in block.content_type.__slots__ if slot != "grammar"]
+                if len(slots) == 1:
+                    lines = [getattr(line, slots[0]) for line in block.lines]
                 else:
-                    out.start_tag("pre")
-                if block.content_type is LineOfCodeMarkup:
-                    out.start_tag("ol")
-                for line in block.lines:
-                    out.write_html(line.__html__())
-                out.end_tag("pre")
-            elif block.content_type is ListItemMarkup:
-                level = 0
-                for line in block.lines:
-                    while level > line.level:
-                        out.end_tag()
-                        level -= 1
-                    while level < line.level:
-                        out.start_tag(line.list_tag(level))
-                        level += 1
-                    out.write_html(line.__html__())
-                while level:
-                    out.end_tag()
-                    level -= 1
-            elif block.content_type is TableRowMarkup:
-                out.start_tag("table", {"cellspacing": 0})
-                for line in block.lines:
-                    out.write_html(line.__html__())
-                out.end_tag("table")
+                    lines = [tuple(getattr(line, slot) for slot in slots) for line in block.lines]
+                blocks.append((block.content_type.__name__, block.params, block.start, block.end, lines))
+        return marshal.dumps((self.dump_version, __version__, self.title, blocks))
+
+    @classmethod
+    def load(cls, data, grammar=None, memoize=False):
+        # Only the title is unpacked straight away; blocks are rebuilt from
+        # the dumped values the first time they are needed.
+        version, syntaq_version, title, blocks = marshal.loads(data)
+        if version != cls.dump_version or syntaq_version != __version__:
+            raise ValueError("Cannot load markup dumped in another format")
+        markup = cls.__new__(cls)
+        markup.grammar = grammar or DEFAULT_GRAMMAR
+        markup.title = title
+        markup.dumped_blocks = blocks
+        if memoize:
+            markup.rendered = {}
+        return markup
+
+    restore_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # blocks are restored once, whichever thread asks for them first
+        if name == "blocks" and "dumped_blocks" in self.__dict__:
+            with self.restore_lock:
+                if "dumped_blocks" in self.__dict__:
+                    self.blocks = self._restore(self.__dict__["dumped_blocks"])
+                    del self.__dict__["dumped_blocks"]
+            return self.__dict__["blocks"]
+        raise AttributeError(name)
+
+    def _restore(self, dumped_blocks):
+        # Blocks and lines are made with __new__ and have their slots set
+        # directly, which costs a fraction of parsing them again.
+        new = object.__new__
+        line_types = self.line_types
+        restorers = dict((type_name, getattr(self, method)) for type_name, method in self.line_restorers.items())
+        blocks = []
+        append = blocks.append
+        for type_name, params, start, end, lines in dumped_blocks:
+            block = new(Block)
+            block.content_type = line_types.get(type_name)
+            block.params = params
+            block.start = start
+            block.end = end
+            block.continued = False
+            restore_lines = restorers.get(type_name)
+            block.lines = lines if restore_lines is None else restore_lines(lines)
+            append(block)
+        return blocks
+
+    def _restore_block(self, dumped):
+        # A block whose lines are a generator which gives one line object
+        # each dumped state in turn: all rendering needs, at the cost of no
+        # line objects at all.
+        type_name, params, start, end, lines = dumped
+        block = Block(params=params, start=start, end=end)
+        block.content_type = self.line_types.get(type_name)
+        if type_name in self.line_restorers:
+            block.lines = self._flyweight_lines(block.content_type, lines)
+        else:
+            block.lines = lines
+        return block
+
+    # Text, preformatted and code blocks are dumped as plain strings, so
+    # only the other kinds of line need restoring.
+    line_restorers = {
+        "HeadingMarkup": "_restore_headings",
+        "HorizontalRuleMarkup": "_restore_rules",
+        "ListItemMarkup": "_restore_list_items",
+        "TableRowMarkup": "_restore_table_rows",
+    }
+
+    def _restore_headings(self, states):
+        new = object.__new__
+        lines = []
+        for level, text in states:
+            line = new(HeadingMarkup)
+            line.level = level
+            line.text = text
+            lines.append(line)
+        return lines
+
+    def _restore_rules(self, states):
+        return [object.__new__(HorizontalRuleMarkup) for _ in states]
+
+    def _restore_list_items(self, states):
+        new = object.__new__
+        grammar = self.grammar
+        lines = []
+        for signature, level, text in states:
+            line = new(ListItemMarkup)
+            line.signature = signature
+            line.level = level
+            line.text = text
+            line.grammar = grammar
+            lines.append(line)
+        return lines
+
+    def _restore_table_rows(self, states):
+        new = object.__new__
+        grammar = self.grammar
+        lines = []
+        for markup in states:
+            line = new(TableRowMarkup)
+            line.markup = markup
+            line.grammar = grammar
+            lines.append(line)
+        return lines
+
+    def _line_slots(self, content_type):
+        slots = [slot for slot in content_type.__slots__ if slot != "grammar"]
+        return slots, "grammar" in content_type.__slots__
+
+    def _flyweight_lines(self, content_type, states):
+        line = content_type.__new__(content_type)
+        slots, has_grammar = self._line_slots(content_type)
+        if has_grammar:
+            line.grammar = self.grammar
+        if len(slots) == 1:
+            slot = slots[0]
+            for value in states:
+                setattr(line, slot, value)
+                yield line
+        else:
+            for state in states:
+                for slot, value in zip(slots, state):
+                    setattr(line, slot, value)
+                yield line
+
+
+# On-disk cache of parsed markup keyed by a hash of the source text. Entries
+# are written atomically so several processes may share one directory; the
+# least recently used ones are removed once the total exceeds max_bytes.
+class ParseCache(object):
+
+    suffix = ".syntaq-ir"
+
+    def __init__(self, directory, max_bytes=268435456):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        try:
+            os.makedirs(directory)
+        except OSError:
+            if not os.path.isdir(directory):
+                raise
+        self.hits = 0
+        self.misses = 0
+        self.size = sum(size for _, size, _ in self._entries())
+
+    def path(self, source, grammar=None):
+        # blocks depend on the line starts of the grammar, so parses made
+        # with any but the default line starts are kept apart
+        digest = hashlib.sha1(source.encode("utf-8"))
+        line_starts = (grammar or DEFAULT_GRAMMAR).line_starts
+        if line_starts != LINE_STARTS:
+            digest.update(repr(sorted(line_starts.items())).encode("utf-8"))
+        name = "{0}-{1}-{2}{3}".format(digest.hexdigest(), __version__, Markup.dump_version, self.suffix)
+        return os.path.join(self.directory, name)
+
+    def get(self, source, grammar=None):
+        path = self.path(source, grammar)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path, None)
+            markup = Markup.load(data, grammar)
+        except (IOError, OSError, EOFError, TypeError, ValueError):
+            # missing, evicted by another process or unreadable
+            self.misses += 1
+            return None
+        self.hits += 1
+        return markup
+
+    def put(self, source, markup):
+        data = markup.dump()
+        fd, temp = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            replace_file(temp, self.path(source, markup.grammar))
+        except BaseException:
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+            raise
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            self.evict()
+
+    def markup(self, source, grammar=None):
+        markup = self.get(source, grammar)
+        if markup is None:
+            markup = Markup(source, grammar)
+            self.put(source, markup)
+        return markup
+
+    def evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+        self.size = total
+
+    def clear(self):
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.size = 0
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(self.suffix):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+
+class MarkupStream(object):
+
+    # Tables are rendered `table_rows` rows at a time, as soon as those rows
+    # have been read, so however long a table is it is never held in full.
+
+    default_table_rows = 256
+
+    def __init__(self, source, grammar=None, table_rows=None):
+        self.source = source
+        self.grammar = grammar or DEFAULT_GRAMMAR
+        self.parser = BlockParser(self.grammar)
+        self.table_rows = table_rows or self.default_table_rows
+
+    @property
+    def title(self):
+        # the highest-level heading seen so far; final once the stream is
+        # exhausted
+        return self.parser.title
+
+    def __iter__(self):
+        sink = IterableSink()
+        out = HTMLOutputStream(sink=sink)
+        for _ in self.write_blocks(out):
+            out.flush()
+            yield "".join(sink.drain())
+
+    def write_blocks(self, out):
+        for block in self.parser.parse(lines_of(self.source), table_rows=self.table_rows):
+            write_block(out, block, self.grammar)
+            yield
+
+    def write(self, out):
+        for _ in self.write_blocks(out):
+            pass
+        out.flush()
+
+    def chunks(self, chunk_size=None, encoding=None):
+        return iter_chunks(self.write_blocks, chunk_size, encoding)
+
+
+class MarkupFile(MarkupStream):
+
+    # A MarkupStream over a file, read through read_chunks so that it is
+    # never held in memory in full. Unlike a stream it can be rendered more
+    # than once, and its title is known before the first block is written:
+    # it is found by an outline of the file, which costs a first pass.
+
+    def __init__(self, path, grammar=None, table_rows=None, encoding="utf-8"):
+        self.path = path
+        self.encoding = encoding
+        self.grammar = grammar or DEFAULT_GRAMMAR
+        self.parser = BlockParser(self.grammar)
+        self.table_rows = table_rows or self.default_table_rows
+        self._outline = None
+
+    @property
+    def source(self):
+        return read_chunks(self.path, encoding=self.encoding)
+
+    @property
+    def title(self):
+        if self._outline is None:
+            self._outline = outline(self.source)
+        return self._outline[0]
+
+    def __html__(self):
+        out = HTMLOutputStream()
+        self.write(out)
+        return out.__html__()
+
+
+class IncrementalMarkup(object):
+
+    def __init__(self, markup="", grammar=None):
+        self.grammar = grammar or DEFAULT_GRAMMAR
+        self.lines = []
+        self.blocks = []
+        self.hashes = []
+        self.fragments = []
+        self.title = None
+        self.update(markup)
+
+    def __html__(self):
+        return "".join(self.fragments)
+
+    def _hash(self, block):
+        text = "".join(self.lines[block.start:block.end])
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def _render(self, block):
+        out = HTMLOutputStream()
+        write_block(out, block, self.grammar)
         return out.__html__()
 
+    def update(self, markup):
+        # Re-parses only the blocks around the lines that differ from the
+        # previous version and re-renders only those whose content changed.
+        # Returns the full HTML along with a list of (index, html) pairs for
+        # the blocks which were rendered afresh.
+        old_lines, lines = self.lines, markup.splitlines(True)
+        limit = min(len(old_lines), len(lines))
+        p = 0
+        while p < limit and old_lines[p] == lines[p]:
+            p += 1
+        q = 0
+        while q < limit - p and old_lines[-1 - q] == lines[-1 - q]:
+            q += 1
+        if p == len(old_lines) == len(lines):
+            return self.__html__(), []
+        delta = len(lines) - len(old_lines)
+        changed_end = len(lines) - q
+        # parsing from the start of any block gives the same blocks as
+        # parsing from the top, so start again from the last block which
+        # begins before the first changed line; the block before that may
+        # be extended or merged by the edit
+        starts = [block.start for block in self.blocks]
+        k = bisect_left(starts, p) - 1
+        if k >= 0:
+            restart = starts[k]
+        else:
+            k, restart = 0, 0
+        self.lines = lines
+        blocks, resync = [], len(self.blocks)
+        for block in BlockParser(self.grammar).parse(islice(lines, restart, None), restart):
+            if block.start >= changed_end:
+                # once a new block starts at the same place in the unchanged
+                # tail as an old block did, everything after it is the same
+                j = bisect_left(starts, block.start - delta, k)
+                if j < len(starts) and starts[j] == block.start - delta:
+                    resync = j
+                    break
+            blocks.append(block)
+        for block in self.blocks[resync:]:
+            block.start += delta
+            block.end += delta
+        previous = dict(zip(self.hashes[k:resync], self.fragments[k:resync]))
+        hashes, fragments, changes = [], [], []
+        for i, block in enumerate(blocks, k):
+            h = self._hash(block)
+            if h in previous:
+                fragment = previous[h]
+            else:
+                fragment = self._render(block)
+                changes.append((i, fragment))
+            hashes.append(h)
+            fragments.append(fragment)
+        self.blocks[k:resync] = blocks
+        self.hashes[k:resync] = hashes
+        self.fragments[k:resync] = fragments
+        self.title, title_level = None, 7
+        for block in self.blocks:
+            if block.content_type is HeadingMarkup:
+                heading = block.lines[0]
+                if not self.title or heading.level < title_level:
+                    self.title, title_level = heading.text, heading.level
+        return self.__html__(), changes
+
+
+DEFAULT_GRAMMAR = Grammar()
+
 
 class StyleSheet(object):
 
@@ -699,23 +2017,332 @@ class StyleSheet(object):
         return SYNTAQ_CSS
 
 
+class DocumentShell(object):
+
+    # The parts of a document around its body, built once: with the style
+    # sheet inlined or, given the URL of a `stylesheet`, linking to it.
+    # Encoded copies of the head and tail are kept for each encoding used.
+
+    shells = {}
+
+    def __init__(self, stylesheet=None):
+        self.stylesheet = stylesheet
+        template = DOCUMENT_TEMPLATE
+        if stylesheet:
+            template = template.replace('<style type="text/css">{css}</style>',
+                                        '<link rel="stylesheet" type="text/css" href="{css}">')
+            css = HTML.entities(stylesheet)
+        else:
+            css = StyleSheet().__css__()
+        head, _, tail = template.partition("{body}")
+        self.before_title, _, self.after_title = head.format(title="\0", css=css, head="").partition("\0")
+        self.tail = tail.format()
+        self.encodings = {}
+
+    @classmethod
+    def for_stylesheet(cls, stylesheet=None):
+        try:
+            return cls.shells[stylesheet]
+        except KeyError:
+            return cls.shells.setdefault(stylesheet, cls(stylesheet))
+
+    def head(self, title):
+        return self.before_title + (title or "") + self.after_title
+
+    def head_bytes(self, title, encoding="utf-8"):
+        before, after, _ = self.encoded(encoding)
+        return before + (title or "").encode(encoding) + after
+
+    def tail_bytes(self, encoding="utf-8"):
+        return self.encoded(encoding)[2]
+
+    def encoded(self, encoding):
+        try:
+            return self.encodings[encoding]
+        except KeyError:
+            parts = tuple(part.encode(encoding) for part in (self.before_title, self.after_title, self.tail))
+            return self.encodings.setdefault(encoding, parts)
+
+
 class Document(object):
 
-    def __init__(self, markup):
-        self.markup = Markup(markup)
+    def __init__(self, markup, grammar=None, stylesheet=None):
+        self.markup = Markup(markup, grammar)
+        self.shell = DocumentShell.for_stylesheet(stylesheet)
+
+    @classmethod
+    def from_file(cls, path, grammar=None, stylesheet=None, encoding="utf-8"):
+        # a document rendered straight from a file as it is read; see
+        # MarkupFile
+        document = cls.__new__(cls)
+        document.markup = MarkupFile(path, grammar, encoding=encoding)
+        document.shell = DocumentShell.for_stylesheet(stylesheet)
+        return document
 
     def __html__(self):
-        return DOCUMENT_TEMPLATE.format(
-            title=self.markup.title or "",
-            css=StyleSheet().__css__(),
-            head="",
-            body=self.markup.__html__(),
+        return "".join([self.shell.head(self.markup.title), self.markup.__html__(), self.shell.tail])
+
+    def write_blocks(self, out):
+        out.write_html(self.shell.head(self.markup.title))
+        yield
+        for _ in self.markup.write_blocks(out):
+            yield
+        out.write_html(self.shell.tail)
+
+    def write(self, out):
+        for _ in self.write_blocks(out):
+            pass
+        out.flush()
+
+    def chunks(self, chunk_size=None, encoding=None):
+        if not encoding:
+            return iter_chunks(self.write_blocks, chunk_size)
+        # only the body needs encoding; the head and tail are encoded once
+        return chain(
+            [self.shell.head_bytes(self.markup.title, encoding)],
+            iter_chunks(self.markup.write_blocks, chunk_size, encoding),
+            [self.shell.tail_bytes(encoding)],
         )
 
+    def render_bytes(self, encoding="utf-8", chunk_size=None):
+        return b"".join(self.chunks(chunk_size, encoding))
+
 
-if __name__ == "__main__":
-    import codecs
-    import sys
-    if len(sys.argv) > 1:
-        markup = codecs.open(sys.argv[1], "r", "UTF-8").read()
-        print(Document(markup).__html__())
+class Profiler(object):
+
+    # Records call counts and cumulative times for each stage of parsing
+    # and rendering while active:
+    #
+    #     with Profiler() as profiler:
+    #         Document(markup).__html__()
+    #     print(profiler.report())
+    #
+    # Timing wrappers are installed on entry and removed on exit, so there
+    # is no cost at all when no profiler is active. Only one profiler may be
+    # active at a time, and it only records work done by the thread which
+    # entered it; other threads pass straight through the wrappers.
+
+    active = None
+
+    block_names = {
+        None: "paragraph",
+        "HeadingMarkup": "heading",
+        "HorizontalRuleMarkup": "horizontal_rule",
+        "ListItemMarkup": "list",
+        "PreformattedMarkup": "preformatted",
+        "LineOfCodeMarkup": "code",
+        "TableRowMarkup": "table",
+    }
+
+    def __init__(self):
+        self.calls = defaultdict(int)
+        self.times = defaultdict(float)
+        self.own_times = defaultdict(float)
+        self.stack = []
+        self.patches = []
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        if Profiler.active is not None:
+            raise ValueError("Another profiler is already active")
+        Profiler.active = self
+        self.thread = threading.current_thread()
+        module = sys.modules[__name__]
+        self._patch(BlockParser, "parse", self._timed_generator("classify", BlockParser.parse))
+        self._patch(HeadingMarkup, "__init__", self._timed("parse:heading", HeadingMarkup.__init__))
+        self._patch(ListItemMarkup, "__init__", self._timed("parse:list_item", ListItemMarkup.__init__))
+        self._patch(HeadingMarkup, "from_parts",
+                    classmethod(self._timed("parse:heading", HeadingMarkup.from_parts.__func__)))
+        self._patch(ListItemMarkup, "from_parts",
+                    classmethod(self._timed("parse:list_item", ListItemMarkup.from_parts.__func__)))
+        self._patch(TableRowMarkup, "__init__", self._timed("parse:table_row", TableRowMarkup.__init__))
+        self._patch(Partitioner, "partition", self._timed_generator("partition", Partitioner.partition))
+        self._patch(InlineMarkup, "__html__", self._timed("inline", InlineMarkup.__html__))
+        self._patch(HTML, "entities", staticmethod(self._timed("escape", HTML.entities)))
+        self._patch(module, "auto_link", self._timed("autolink", auto_link))
+        self._patch(module, "write_block", self._timed_block(write_block))
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.elapsed += time.time() - self.start
+        while self.patches:
+            owner, name, original = self.patches.pop()
+            setattr(owner, name, original)
+        Profiler.active = None
+
+    def _patch(self, owner, name, replacement):
+        self.patches.append((owner, name, owner.__dict__[name]))
+        setattr(owner, name, replacement)
+
+    def _record(self, stage, started, calls=1):
+        elapsed = time.time() - started
+        nested = self.stack.pop()
+        self.calls[stage] += calls
+        self.times[stage] += elapsed
+        self.own_times[stage] += elapsed - nested
+        if self.stack:
+            self.stack[-1] += elapsed
+
+    def _timed(self, stage, function):
+        def timed(*args, **kwargs):
+            if threading.current_thread() is not self.thread:
+                return function(*args, **kwargs)
+            self.stack.append(0.0)
+            started = time.time()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._record(stage, started)
+        return timed
+
+    def _timed_generator(self, stage, function):
+        # each step of the generator is timed, and it counts as one call
+        def timed(*args, **kwargs):
+            iterator = function(*args, **kwargs)
+            if threading.current_thread() is not self.thread:
+                return iterator
+            return self._timed_steps(stage, iter(iterator))
+        return timed
+
+    def _timed_steps(self, stage, iterator):
+        calls = 1
+        while True:
+            self.stack.append(0.0)
+            started = time.time()
+            try:
+                value = next(iterator)
+            except StopIteration:
+                self._record(stage, started, calls)
+                return
+            except Exception:
+                self._record(stage, started, calls)
+                raise
+            self._record(stage, started, calls)
+            calls = 0
+            yield value
+
+    def _timed_block(self, function):
+        stages = {}
+        for content_type, name in self.block_names.items():
+            stages[content_type] = self._timed("render:" + name, function)
+
+        def timed(out, block, grammar=None):
+            content_type = block.content_type and block.content_type.__name__
+            return stages[content_type](out, block, grammar)
+        return timed
+
+    def stats(self):
+        return dict(
+            (stage, {"calls": self.calls[stage], "time": self.times[stage], "own_time": self.own_times[stage]})
+            for stage in self.calls
+        )
+
+    def report(self):
+        lines = ["{0:<24} {1:>9} {2:>11} {3:>11} {4:>7}".format("stage", "calls", "total ms", "own ms", "own %")]
+        for stage in sorted(self.calls, key=lambda stage: -self.own_times[stage]):
+            lines.append("{0:<24} {1:>9} {2:>11.2f} {3:>11.2f} {4:>6.1f}%".format(
+                stage, self.calls[stage], 1000 * self.times[stage], 1000 * self.own_times[stage],
+                100 * self.own_times[stage] / self.elapsed if self.elapsed else 0.0,
+            ))
+        lines.append("{0:<24} {1:>9} {2:>11.2f}".format("(elapsed)", "", 1000 * self.elapsed))
+        return "\n".join(lines)
+
+
+CompileResult = namedtuple("CompileResult", ["id", "html", "error"])
+
+
+def compile_batch(batch):
+    results = []
+    for id, markup in batch:
+        stylesheet = None
+        try:
+            if isinstance(markup, tuple):
+                markup, stylesheet = markup
+            results.append(CompileResult(id, Document(markup, stylesheet=stylesheet).__html__(), None))
+        except Exception as error:
+            # exceptions are reported as text as they may not be picklable
+            results.append(CompileResult(id, None, "{0}: {1}".format(error.__class__.__name__, error)))
+    return results
+
+
+def batches(documents, chunksize, chunk_bytes):
+    # groups small documents together to amortise the cost of passing them
+    # between processes; large documents travel on their own
+    batch, size = [], 0
+    for id, markup in enumerate(documents):
+        batch.append((id, markup))
+        try:
+            size += len(markup[0] if isinstance(markup, tuple) else markup)
+        except (TypeError, IndexError):
+            # not a document at all, which compile_batch will report
+            pass
+        if len(batch) >= chunksize or size >= chunk_bytes:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+
+def compile_many(documents, workers=None, chunksize=64, chunk_bytes=262144, ordered=True):
+    # Compiles an iterable of markup strings into HTML documents across a
+    # pool of worker processes, yielding a CompileResult for each one with
+    # the position of the document in the input as its id. Results follow
+    # the input order unless `ordered` is false, in which case they are
+    # yielded as soon as they are ready. Documents which fail to compile
+    # yield a result with `error` set instead of `html`. A document may also
+    # be given as a (markup, stylesheet) pair to link to an external style
+    # sheet instead of inlining one.
+    return compile_pooled(documents, workers, chunksize, chunk_bytes, ordered)
+
+
+def render_many_threaded(documents, workers=None, chunksize=8, chunk_bytes=65536, ordered=True):
+    # As compile_many, but across a pool of threads sharing one process.
+    # Rendering holds no state outside the objects of each call, so this
+    # scales with the number of threads on a free-threaded build; with a
+    # GIL it only saves the cost of passing documents between processes.
+    return compile_pooled(documents, workers, chunksize, chunk_bytes, ordered, threads=True)
+
+
+def compile_pooled(documents, workers, chunksize, chunk_bytes, ordered, threads=False):
+    workers = workers or multiprocessing.cpu_count()
+    if workers == 1:
+        for batch in batches(documents, chunksize, chunk_bytes):
+            for result in compile_batch(batch):
+                yield result
+        return
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+    def completed(pending):
+        if ordered:
+            return pending.popleft().result()
+        results = []
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.remove(future)
+            results.extend(future.result())
+        return results
+
+    executor_class = ThreadPoolExecutor if threads else ProcessPoolExecutor
+    with executor_class(max_workers=workers) as executor:
+        # only a few batches per worker are in flight at once so that the
+        # input is consumed lazily
+        pending = deque()
+        for batch in batches(documents, chunksize, chunk_bytes):
+            pending.append(executor.submit(compile_batch, batch))
+            while len(pending) >= 4 * workers:
+                for result in completed(pending):
+                    yield result
+        while pending:
+            for result in completed(pending):
+                yield result
+
+
+def __getattr__(name):
+    # the asyncio support is only imported when it is first used, so that
+    # importing syntaq does not import asyncio (module __getattr__ needs
+    # Python 3.7; earlier versions may import syntaq.aio directly)
+    if name in ("AsyncRenderer", "render_async"):
+        from syntaq import aio
+        return getattr(aio, name)
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
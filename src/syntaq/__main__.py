@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2011-2012 Nigel Small
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+
+from syntaq import Document, Profiler, StyleSheet, compile_many, replace_file
+
+
+MANIFEST = ".syntaq-manifest.json"
+
+
+def sources(src, extensions):
+    for root, dirs, files in os.walk(src):
+        dirs.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1] in extensions:
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, src)
+
+
+def target(dest, source):
+    return os.path.join(dest, os.path.splitext(source)[0] + ".html")
+
+
+def load_manifest(dest):
+    try:
+        with io.open(os.path.join(dest, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+
+
+def save_manifest(dest, manifest):
+    path = os.path.join(dest, MANIFEST)
+    with io.open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(json.dumps(manifest, indent=0, sort_keys=True))
+    replace_file(path + ".tmp", path)
+
+
+def stylesheet_href(dest, source, stylesheet):
+    # the URL of the style sheet relative to the page built from `source`
+    page_dir = os.path.dirname(target(dest, source))
+    return os.path.relpath(os.path.join(dest, stylesheet), page_dir).replace(os.sep, "/")
+
+
+def write_stylesheet(dest, stylesheet):
+    path = os.path.join(dest, stylesheet)
+    data = StyleSheet().__css__().encode("utf-8")
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return
+    except (IOError, OSError):
+        pass
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def build(src, dest, workers=None, extensions=(".syntaq",), out=None, stylesheet=None):
+    # Compiles every markup file below `src` into a mirrored tree of HTML
+    # files below `dest`. Files whose size and mtime, or failing that whose
+    # content hash, match the manifest from the previous build are skipped.
+    # Given a `stylesheet` path relative to `dest`, the style sheet is
+    # written there once and linked to from every page instead of inlined.
+    out = out or sys.stdout
+    t0 = time.time()
+    old_manifest = load_manifest(dest)
+    manifest, stale = {}, []
+    # Sources which cannot be read or decoded are reported and counted as
+    # failed, like those which fail to compile; results are matched to the
+    # sources queued for compiling by their position in that queue.
+    queued, unreadable = [], []
+
+    def report_unreadable(source, error):
+        out.write("{0}: {1}: {2}\n".format(source, error.__class__.__name__, error))
+        unreadable.append(source)
+
+    if stylesheet:
+        write_stylesheet(dest, stylesheet)
+    for source in sources(src, extensions):
+        try:
+            st = os.stat(os.path.join(src, source))
+        except OSError as error:
+            report_unreadable(source, error)
+            continue
+        entry = {"mtime": st.st_mtime, "size": st.st_size}
+        if stylesheet:
+            entry["stylesheet"] = stylesheet
+        previous = old_manifest.get(source, {})
+        exists = os.path.exists(target(dest, source)) and previous.get("stylesheet") == stylesheet
+        if exists and previous.get("mtime") == entry["mtime"] and previous.get("size") == entry["size"]:
+            manifest[source] = previous
+            continue
+        try:
+            with open(os.path.join(src, source), "rb") as f:
+                entry["sha1"] = hashlib.sha1(f.read()).hexdigest()
+        except (IOError, OSError) as error:
+            report_unreadable(source, error)
+            continue
+        if exists and previous.get("sha1") == entry["sha1"]:
+            manifest[source] = entry
+            continue
+        stale.append((source, entry))
+
+    def documents():
+        for source, entry in stale:
+            try:
+                # line endings are left as they are, as Document would see them
+                with io.open(os.path.join(src, source), encoding="utf-8", newline="") as f:
+                    markup = f.read()
+            except (IOError, OSError, UnicodeDecodeError) as error:
+                report_unreadable(source, error)
+                continue
+            queued.append((source, entry))
+            if stylesheet:
+                yield markup, stylesheet_href(dest, source, stylesheet)
+            else:
+                yield markup
+
+    built, failed, size = 0, 0, 0
+    try:
+        for result in compile_many(documents(), workers=workers, ordered=False):
+            source, entry = queued[result.id]
+            if result.error:
+                out.write("{0}: {1}\n".format(source, result.error))
+                failed += 1
+                continue
+            path = target(dest, source)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            data = result.html.encode("utf-8")
+            with open(path, "wb") as f:
+                f.write(data)
+            manifest[source] = entry
+            built += 1
+            size += entry["size"]
+    finally:
+        # whatever stops the build, the files which were built are kept
+        if not os.path.isdir(dest):
+            os.makedirs(dest)
+        save_manifest(dest, manifest)
+    failed += len(unreadable)
+    seconds = time.time() - t0
+    out.write("Built {0} files ({1} unchanged, {2} failed) in {3:.2f}s: "
+              "{4:.1f} files/s, {5:.0f} bytes/s\n".format(
+                  built, len(manifest) - built, failed, seconds,
+                  built / seconds if seconds else 0, size / seconds if seconds else 0))
+    return built, failed
+
+
+def main(args=None):
+    args = sys.argv[1:] if args is None else args
+    if args and args[0] == "build":
+        parser = argparse.ArgumentParser(prog="syntaq build",
+                                         description="Compile a tree of markup files to HTML.")
+        parser.add_argument("src")
+        parser.add_argument("dest")
+        parser.add_argument("-j", "--workers", type=int, default=None,
+                            help="number of worker processes (default: one per core)")
+        parser.add_argument("-e", "--ext", action="append", default=None,
+                            help="markup file extension (default: .syntaq)")
+        parser.add_argument("--external-css", nargs="?", const="syntaq.css", default=None, metavar="NAME",
+                            help="write the style sheet once to DEST/NAME (default: syntaq.css) "
+                                 "and link to it instead of inlining it in every page")
+        options = parser.parse_args(args[1:])
+        _, failed = build(options.src, options.dest, options.workers,
+                          tuple(options.ext or [".syntaq"]), stylesheet=options.external_css)
+        return 1 if failed else 0
+    parser = argparse.ArgumentParser(prog="syntaq",
+                                     description="Compile a markup file to HTML, or use "
+                                                 "'build SRC DEST' to compile a tree of files.")
+    parser.add_argument("file")
+    parser.add_argument("--profile", action="store_true",
+                        help="print a breakdown of time spent per stage instead of the HTML")
+    options = parser.parse_args(args)
+    if options.profile:
+        with io.open(options.file, encoding="utf-8") as f:
+            markup = f.read()
+        with Profiler() as profiler:
+            Document(markup).__html__()
+        print(profiler.report())
+    else:
+        # the file is rendered as it is read, so it is never held in full
+        for chunk in Document.from_file(options.file).chunks(chunk_size=65536):
+            sys.stdout.write(chunk)
+        sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
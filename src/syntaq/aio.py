@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright 2011-2012 Nigel Small
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import functools
+import weakref
+
+from syntaq import Document, DocumentShell, HTMLOutputStream, MarkupStream
+
+
+def render(markup, grammar=None):
+    return Document(markup, grammar).__html__()
+
+
+class AsyncRenderer(object):
+
+    # Renders documents for code running on an asyncio event loop:
+    #
+    #     renderer = AsyncRenderer(concurrency=4)
+    #     html = await renderer.render(markup)
+    #
+    # By default the work is passed to `executor` (the loop's default
+    # executor if None) with no more than `concurrency` documents rendering
+    # at once; further callers wait their turn, so a burst of large
+    # documents cannot queue up unbounded work behind the executor. With
+    # `in_loop`, the document is instead rendered on the loop itself, which
+    # is given back control after every `yield_every` blocks.
+
+    def __init__(self, executor=None, concurrency=4, yield_every=16):
+        if concurrency < 1:
+            raise ValueError("Concurrency must be at least 1")
+        if yield_every < 1:
+            raise ValueError("Blocks between yields must be at least 1")
+        self.executor = executor
+        self.concurrency = concurrency
+        self.yield_every = yield_every
+        self.semaphores = weakref.WeakKeyDictionary()
+
+    def semaphore(self, loop):
+        # semaphores are created per loop as they may not be shared
+        try:
+            return self.semaphores[loop]
+        except KeyError:
+            semaphore = self.semaphores[loop] = asyncio.Semaphore(self.concurrency)
+            return semaphore
+
+    async def render(self, markup, grammar=None, in_loop=False):
+        if in_loop:
+            return await self.render_in_loop(markup, grammar)
+        loop = asyncio.get_running_loop()
+        async with self.semaphore(loop):
+            return await loop.run_in_executor(self.executor, functools.partial(render, markup, grammar))
+
+    async def render_in_loop(self, markup, grammar=None):
+        # The markup is parsed a block at a time as it is rendered, so that
+        # parsing gives way to the loop too. The head is only written once
+        # the body is, as the title may come from any heading.
+        stream = MarkupStream(markup, grammar)
+        out = HTMLOutputStream()
+        for i, _ in enumerate(stream.write_blocks(out), 1):
+            if i % self.yield_every == 0:
+                await asyncio.sleep(0)
+        out.flush()
+        shell = DocumentShell.for_stylesheet()
+        return "".join([shell.head(stream.title), out.__html__(), shell.tail])
+
+
+DEFAULT_RENDERER = AsyncRenderer()
+
+
+async def render_async(markup, grammar=None, in_loop=False, renderer=None):
+    return await (renderer or DEFAULT_RENDERER).render(markup, grammar, in_loop)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import syntaq.aio
+from syntaq import AsyncRenderer, Document, render_async
+
+
+MARKUP = "= Title\n\n" + "\n\n".join("Paragraph {0} with **bold** text.".format(i) for i in range(100))
+
+
+class AsyncRenderTester(unittest.TestCase):
+
+    def test_render_async(self):
+        html = asyncio.run(render_async(MARKUP))
+        assert html == Document(MARKUP).__html__()
+
+    def test_render_async_in_loop(self):
+        html = asyncio.run(render_async(MARKUP, in_loop=True))
+        assert html == Document(MARKUP).__html__()
+
+    def test_in_loop_rendering_yields_to_other_tasks(self):
+        renderer = AsyncRenderer(yield_every=10)
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(None)
+                await asyncio.sleep(0)
+
+        async def main():
+            task = asyncio.ensure_future(ticker())
+            await asyncio.sleep(0)
+            del ticks[:]
+            await renderer.render(MARKUP, in_loop=True)
+            task.cancel()
+
+        asyncio.run(main())
+        assert len(ticks) >= 10
+
+    def test_in_loop_rendering_yields_while_parsing(self):
+        renderer = AsyncRenderer(yield_every=10)
+        ticks = []
+        ticks_when_parsed = []
+
+        def lines():
+            for line in MARKUP.splitlines(True):
+                yield line
+            ticks_when_parsed.append(len(ticks))
+
+        async def ticker():
+            while True:
+                ticks.append(None)
+                await asyncio.sleep(0)
+
+        async def main():
+            task = asyncio.ensure_future(ticker())
+            await asyncio.sleep(0)
+            del ticks[:]
+            html = await renderer.render(lines(), in_loop=True)
+            task.cancel()
+            return html
+
+        assert asyncio.run(main()) == Document(MARKUP).__html__()
+        assert ticks_when_parsed[0] >= 10
+
+    def test_in_loop_title_may_come_last(self):
+        markup = "Intro.\n\n== Section\n\n= Title"
+        assert asyncio.run(render_async(markup, in_loop=True)) == Document(markup).__html__()
+
+    def test_concurrency_is_limited(self):
+        lock = threading.Lock()
+        active = [0]
+        peak = [0]
+
+        def render(markup, grammar=None):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+            return markup
+
+        async def main(renderer):
+            return await asyncio.gather(*[renderer.render(str(i)) for i in range(12)])
+
+        original = syntaq.aio.render
+        syntaq.aio.render = render
+        try:
+            with ThreadPoolExecutor(8) as executor:
+                renderer = AsyncRenderer(executor, concurrency=2)
+                results = asyncio.run(main(renderer))
+        finally:
+            syntaq.aio.render = original
+        assert results == [str(i) for i in range(12)]
+        assert peak[0] == 2
+
+    def test_renderer_can_be_used_on_more_than_one_loop(self):
+        renderer = AsyncRenderer(concurrency=1)
+        for _ in range(2):
+            assert asyncio.run(renderer.render("foo")) == Document("foo").__html__()
+
+    def test_importing_syntaq_does_not_import_asyncio(self):
+        code = "import sys, syntaq; assert 'asyncio' not in sys.modules; syntaq.AsyncRenderer"
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(syntaq.aio.__file__)))
+        subprocess.check_call([sys.executable, "-c", code], env=env)
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            AsyncRenderer(concurrency=0)
+        with self.assertRaises(ValueError):
+            AsyncRenderer(yield_every=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
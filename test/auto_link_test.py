@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+import unittest
+
+from syntaq import URL, auto_link, find_urls
+
+
+class FindURLsTester(unittest.TestCase):
+
+    samples = [
+        "",
+        "no links here",
+        "see http://example.com/ for more",
+        "http://example.com/foo.",
+        "(see http://en.wikipedia.org/wiki/Foo_(bar)) please",
+        "http://example.com/((a)b)c http://example.com/(",
+        "mailto:nigel@example.com, ftp:/x ftp:///",
+        "www.example.com www12.example.com www1234.example.com",
+        "example.co.uk/path?q=1&r=2 a.b/ x.com/",
+        "foo_http://example.com/ -example.com/x .example.com/x",
+        u"HTTP://EXAMPLE.COM/ «http://example.com/» ıx:y",
+        "http://example.com/<b>?",
+    ]
+
+    def test_same_urls_as_pattern(self):
+        for text in self.samples:
+            assert list(find_urls(text)) == [match.span() for match in URL.finditer(text)], text
+
+    def test_text_without_links_is_only_escaped(self):
+        assert auto_link("a < b") == "a &lt; b"
+
+    def test_links(self):
+        assert auto_link("see http://example.com/?a&b") == \
+            'see <a href="http://example.com/?a&amp;b">http://example.com/?a&amp;b</a>'
+
+    def test_pathological_input_scales_linearly(self):
+        # nested repetition in URL makes it backtrack exponentially on these
+        for unit in ("http://x" + "(" * 20, "http://" + "a," * 20, "www.a" + "((a)" * 10):
+            small, large = unit * 1000, unit * 4000
+            t0 = time.time()
+            list(find_urls(small))
+            t1 = time.time()
+            list(find_urls(large))
+            t2 = time.time()
+            assert t2 - t1 < 8 * (t1 - t0) + 0.1
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from syntaq import (CODE_LINE, FENCE_END_LINE, FENCED_LINE, HEADING_LINE, ITEM_LINE, PRE_LINE, ROW_LINE,
+                    RULE_LINE, TEXT_LINE, block_lines)
+
+
+class BlockLinesTester(unittest.TestCase):
+
+    def kinds(self, *lines):
+        return list(block_lines(line + "\n" for line in lines))
+
+    def test_headings(self):
+        assert self.kinds("= Title =", "=== Sub", "========= Deep") == [
+            (HEADING_LINE, 1, "Title"), (HEADING_LINE, 3, "Sub"), (HEADING_LINE, 6, "Deep")]
+
+    def test_list_items(self):
+        assert self.kinds("* one", "#*# two", "  ** indented  ") == [
+            (ITEM_LINE, 1, "* one"), (ITEM_LINE, 3, "#*# two"), (ITEM_LINE, 2, "** indented")]
+
+    def test_markers_must_be_complete(self):
+        assert self.kinds("---", "{{ x", "`` y", " = z", " | w") == [
+            (TEXT_LINE, 0, "---"), (TEXT_LINE, 0, "{{ x"), (TEXT_LINE, 0, "`` y"),
+            (TEXT_LINE, 0, " = z"), (TEXT_LINE, 0, " | w")]
+
+    def test_rules_rows_and_text(self):
+        assert self.kinds("-----", "|a|b|", "foo  ", "") == [
+            (RULE_LINE, 0, "-----"), (ROW_LINE, 0, "|a|b|"), (TEXT_LINE, 0, "foo"), (TEXT_LINE, 0, "")]
+
+    def test_fenced_lines_are_not_classified(self):
+        assert self.kinds("{{{ a b", "= x  ", "```", "}}}", "``` py", "* y", "```") == [
+            (PRE_LINE, 0, ["a", "b"]), (FENCED_LINE, 0, "= x  \n"), (FENCED_LINE, 0, "```\n"),
+            (FENCE_END_LINE, 0, "}}}\n"), (CODE_LINE, 0, ["py"]), (FENCED_LINE, 0, "* y\n"),
+            (FENCE_END_LINE, 0, "```\n")]
+
+
+if __name__ == "__main__":
+    unittest.main()
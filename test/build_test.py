@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from syntaq import SYNTAQ_CSS, Document
+from syntaq.__main__ import build, main
+
+
+class BuildTester(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.src = os.path.join(self.root, "src")
+        self.dest = os.path.join(self.root, "dest")
+        self.write("index.syntaq", u"= Home\n\nWelcome **home**.")
+        self.write("docs/guide.syntaq", u"= Guide\n\n* one\n* two")
+        self.write("docs/notes.txt", u"not markup")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, name, text):
+        path = os.path.join(self.src, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with io.open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def read(self, name):
+        with io.open(os.path.join(self.dest, name), encoding="utf-8") as f:
+            return f.read()
+
+    def test_builds_mirrored_tree(self):
+        built, failed = build(self.src, self.dest, workers=1, out=io.StringIO())
+        assert (built, failed) == (2, 0)
+        assert self.read("index.html") == Document(u"= Home\n\nWelcome **home**.").__html__()
+        assert self.read(os.path.join("docs", "guide.html")) == Document(u"= Guide\n\n* one\n* two").__html__()
+        assert not os.path.exists(os.path.join(self.dest, "docs", "notes.html"))
+
+    def test_line_endings_are_kept(self):
+        markup = u"= T\r\n{{{\r\na\r\n}}}\r\n"
+        with open(os.path.join(self.src, "index.syntaq"), "wb") as f:
+            f.write(markup.encode("utf-8"))
+        build(self.src, self.dest, workers=1, out=io.StringIO())
+        with open(os.path.join(self.dest, "index.html"), "rb") as f:
+            assert f.read().decode("utf-8") == Document(markup).__html__()
+
+    def test_undecodable_files_are_reported_and_others_built(self):
+        with open(os.path.join(self.src, "docs", "bad.syntaq"), "wb") as f:
+            f.write(b"\xff\xfe bad\n")
+        out = io.StringIO()
+        built, failed = build(self.src, self.dest, workers=2, out=out)
+        assert (built, failed) == (2, 1)
+        assert "bad.syntaq: UnicodeDecodeError" in out.getvalue()
+        assert "Built 2 files (0 unchanged, 1 failed)" in out.getvalue()
+        assert self.read(os.path.join("docs", "guide.html")) == Document(u"= Guide\n\n* one\n* two").__html__()
+        assert not os.path.exists(os.path.join(self.dest, "docs", "bad.html"))
+        # the files which were built are in the manifest; the bad one is not
+        built, failed = build(self.src, self.dest, workers=1, out=io.StringIO())
+        assert (built, failed) == (0, 1)
+
+    def test_unchanged_files_are_skipped(self):
+        build(self.src, self.dest, workers=1, out=io.StringIO())
+        built, _ = build(self.src, self.dest, workers=1, out=io.StringIO())
+        assert built == 0
+
+    def test_changed_files_are_rebuilt(self):
+        build(self.src, self.dest, workers=1, out=io.StringIO())
+        self.write("index.syntaq", u"= Home\n\nChanged.")
+        built, _ = build(self.src, self.dest, workers=1, out=io.StringIO())
+        assert built == 1
+        assert "Changed." in self.read("index.html")
+
+    def test_touched_but_identical_files_are_skipped(self):
+        build(self.src, self.dest, workers=1, out=io.StringIO())
+        path = os.path.join(self.src, "index.syntaq")
+        st = os.stat(path)
+        os.utime(path, (st.st_atime, st.st_mtime + 10))
+        built, _ = build(self.src, self.dest, workers=1, out=io.StringIO())
+        assert built == 0
+
+    def test_deleted_outputs_are_rebuilt(self):
+        build(self.src, self.dest, workers=1, out=io.StringIO())
+        os.remove(os.path.join(self.dest, "index.html"))
+        built, _ = build(self.src, self.dest, workers=1, out=io.StringIO())
+        assert built == 1
+
+    def test_summary_is_printed(self):
+        out = io.StringIO()
+        build(self.src, self.dest, workers=1, out=out)
+        assert out.getvalue().startswith("Built 2 files")
+        assert "files/s" in out.getvalue()
+        assert "bytes/s" in out.getvalue()
+
+    def test_command_line(self):
+        assert main(["build", self.src, self.dest, "--workers", "1"]) == 0
+        assert os.path.exists(os.path.join(self.dest, "index.html"))
+
+    def test_external_stylesheet(self):
+        build(self.src, self.dest, workers=1, out=io.StringIO(), stylesheet="css/syntaq.css")
+        assert self.read(os.path.join("css", "syntaq.css")) == SYNTAQ_CSS
+        assert 'href="css/syntaq.css"' in self.read("index.html")
+        assert 'href="../css/syntaq.css"' in self.read(os.path.join("docs", "guide.html"))
+        assert SYNTAQ_CSS not in self.read("index.html")
+
+    def test_changing_stylesheet_mode_rebuilds(self):
+        build(self.src, self.dest, workers=1, out=io.StringIO())
+        built, _ = build(self.src, self.dest, workers=1, out=io.StringIO(), stylesheet="syntaq.css")
+        assert built == 2
+        built, _ = build(self.src, self.dest, workers=1, out=io.StringIO(), stylesheet="syntaq.css")
+        assert built == 0
+        built, _ = build(self.src, self.dest, workers=1, out=io.StringIO())
+        assert built == 2
+        assert SYNTAQ_CSS in self.read("index.html")
+
+    def test_command_line_external_css(self):
+        assert main(["build", self.src, self.dest, "--workers", "1", "--external-css"]) == 0
+        assert os.path.exists(os.path.join(self.dest, "syntaq.css"))
+        assert 'href="syntaq.css"' in self.read("index.html")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from syntaq import Document, compile_many
+
+
+DOCUMENTS = ["= Page {0}\n\nSome **text** on page {0}.".format(i) for i in range(50)]
+
+
+class CompileManyTester(unittest.TestCase):
+
+    def test_results_in_order_in_process(self):
+        results = list(compile_many(DOCUMENTS, workers=1, chunksize=7))
+        assert [result.id for result in results] == list(range(50))
+        assert [result.html for result in results] == [Document(d).__html__() for d in DOCUMENTS]
+
+    def test_results_in_order_across_processes(self):
+        results = list(compile_many(DOCUMENTS, workers=2, chunksize=3))
+        assert [result.id for result in results] == list(range(50))
+        assert [result.html for result in results] == [Document(d).__html__() for d in DOCUMENTS]
+
+    def test_unordered_results_carry_ids(self):
+        results = list(compile_many(DOCUMENTS, workers=2, chunksize=3, ordered=False))
+        assert sorted(result.id for result in results) == list(range(50))
+        for result in results:
+            assert result.html == Document(DOCUMENTS[result.id]).__html__()
+
+    def test_errors_are_captured_per_document(self):
+        results = list(compile_many(["foo", b"\xff", "bar"], workers=2, chunksize=1))
+        assert results[0].html is not None
+        assert results[1].html is None
+        assert results[1].error.startswith("AttributeError")
+        assert results[2].html is not None
+
+    def test_documents_which_are_not_markup_are_captured(self):
+        results = list(compile_many(["foo", None, ("bar",), "baz"], workers=1))
+        assert [result.id for result in results] == [0, 1, 2, 3]
+        assert results[1].html is None and results[1].error
+        assert results[2].html is None and results[2].error.startswith("ValueError")
+        assert results[3].html is not None
+
+    def test_large_documents_are_sent_alone(self):
+        documents = ["x" * 1000, "y", "z"]
+        results = list(compile_many(documents, workers=1, chunk_bytes=500))
+        assert [result.id for result in results] == [0, 1, 2]
+
+
+if __name__ == "__main__":
+    unittest.main()
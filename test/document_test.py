@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import unittest
+
+from syntaq import SYNTAQ_CSS, Document, DocumentShell, FileSink, HTMLOutputStream, Markup, MarkupStream
+
+
+SOURCE = "= Title\n\nfoo **bar**\n\n|a|b|\n|c|d|\n\n* baz\n" + "more text\n" * 2000
+
+
+class DocumentChunksTester(unittest.TestCase):
+
+    def test_chunks_join_to_same_html(self):
+        document = Document(SOURCE)
+        assert "".join(document.chunks()) == document.__html__()
+
+    def test_chunks_are_bounded_by_chunk_size(self):
+        chunks = list(Document(SOURCE).chunks(chunk_size=1024))
+        assert len(chunks) > 1
+        assert chunks[0].startswith("<!doctype html>")
+
+    def test_can_encode_chunks(self):
+        document = Document(u"= café\n")
+        assert b"".join(document.chunks(encoding="utf-8")) == document.__html__().encode("utf-8")
+
+    def test_can_write_to_file(self):
+        f = io.StringIO()
+        document = Document(SOURCE)
+        document.write(HTMLOutputStream(sink=FileSink(f)))
+        assert f.getvalue() == document.__html__()
+
+    def test_markup_chunks_join_to_same_html(self):
+        assert "".join(Markup(SOURCE).chunks(chunk_size=100)) == Markup(SOURCE).__html__()
+
+    def test_markup_stream_chunks_join_to_same_html(self):
+        assert "".join(MarkupStream(SOURCE).chunks(chunk_size=100)) == Markup(SOURCE).__html__()
+
+
+class DocumentShellTester(unittest.TestCase):
+
+    def test_shell_is_shared(self):
+        assert Document(u"a").shell is Document(u"b").shell
+        assert DocumentShell.for_stylesheet("a.css") is DocumentShell.for_stylesheet("a.css")
+
+    def test_inline_stylesheet(self):
+        html = Document(u"= Title\n").__html__()
+        assert SYNTAQ_CSS in html
+        assert "<title>Title</title>" in html
+
+    def test_external_stylesheet(self):
+        html = Document(u"= Title\n", stylesheet="../a&b.css").__html__()
+        assert SYNTAQ_CSS not in html
+        assert '<link rel="stylesheet" type="text/css" href="../a&amp;b.css">' in html
+        assert "<title>Title</title>" in html
+        assert html.endswith("</body>\n</html>\n")
+
+    def test_render_bytes(self):
+        for stylesheet in (None, "syntaq.css"):
+            document = Document(u"= café\n\n" + SOURCE, stylesheet=stylesheet)
+            assert document.render_bytes() == document.__html__().encode("utf-8")
+            assert document.render_bytes("latin-1") == document.__html__().encode("latin-1")
+
+    def test_encoded_chunks_join_to_same_bytes(self):
+        document = Document(SOURCE)
+        chunks = list(document.chunks(chunk_size=1024, encoding="utf-8"))
+        assert len(chunks) > 2
+        assert chunks[0].startswith(b"<!doctype html>")
+        assert b"".join(chunks) == document.__html__().encode("utf-8")
+
+
+if __name__ == "__main__":
+    unittest.main()
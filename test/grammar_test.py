@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from syntaq import DEFAULT_GRAMMAR, Grammar, InlineMarkup, Markup, TableRowMarkup
+
+
+class GrammarTester(unittest.TestCase):
+
+    def test_inline_markup_uses_default_grammar(self):
+        line = InlineMarkup("foo **bar**")
+        assert line.grammar is DEFAULT_GRAMMAR
+
+    def test_table_row_markup_uses_default_grammar(self):
+        line = TableRowMarkup("|foo|bar|")
+        assert line.grammar is DEFAULT_GRAMMAR
+
+    def test_partitioners_are_shared(self):
+        a = InlineMarkup("foo")
+        b = InlineMarkup("bar")
+        assert a.grammar.inline_partitioner is b.grammar.inline_partitioner
+
+    def test_markup_passes_grammar_to_lines(self):
+        grammar = Grammar()
+        markup = Markup("* foo\n|bar|\n\nbaz", grammar)
+        assert markup.blocks[0].lines[0].item.grammar is grammar
+        assert markup.blocks[1].lines[0].grammar is grammar
+
+    def test_custom_grammar_renders_same_html(self):
+        grammar = Grammar()
+        markup = "foo **bar** [[baz|qux]] {{img.png|alt}}"
+        assert InlineMarkup(markup, grammar).__html__() == InlineMarkup(markup).__html__()
+
+
+if __name__ == "__main__":
+    unittest.main()
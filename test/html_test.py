@@ -1,9 +1,10 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import io
 import unittest
 
-from syntaq import HTMLOutputStream
+from syntaq import HTML, HTMLOutputStream, ListSink, FileSink, IterableSink
 
 
 class HTMLOutputStreamTester(unittest.TestCase):
@@ -128,5 +129,95 @@ class HTMLOutputStreamTester(unittest.TestCase):
         assert str(out) == "<foo>bar</foo><baz>qux</baz>"
 
 
+class HTMLEntitiesTester(unittest.TestCase):
+
+    def test_plain_text_is_returned_unchanged(self):
+        text = "foo bar"
+        assert HTML.entities(text) is text
+
+    def test_all_entities(self):
+        assert HTML.entities("& ' \" < >") == "&amp; &apos; &quot; &lt; &gt;"
+
+    def test_ampersands_are_not_escaped_twice(self):
+        assert HTML.entities("&lt;&amp;") == "&amp;lt;&amp;amp;"
+
+    def test_non_ascii_text(self):
+        assert HTML.entities(u"caf\u00e9 & cr\u00e8me") == u"caf\u00e9 &amp; cr\u00e8me"
+
+    def test_plain_bytes_are_returned_unchanged(self):
+        data = b"foo bar"
+        assert HTML.entities_bytes(data) is data
+
+    def test_all_byte_entities(self):
+        assert HTML.entities_bytes(b"& ' \" < >") == b"&amp; &apos; &quot; &lt; &gt;"
+
+    def test_utf8_bytes(self):
+        text = u"caf\u00e9 <cr\u00e8me>"
+        assert HTML.entities_bytes(text.encode("utf-8")) == HTML.entities(text).encode("utf-8")
+
+
+class HTMLOutputStreamSinkTester(unittest.TestCase):
+
+    def test_can_write_to_list_sink(self):
+        sink = ListSink()
+        out = HTMLOutputStream(sink=sink)
+        out.element("p", text="foo & bar")
+        out.close()
+        assert sink.__html__() == "<p>foo &amp; bar</p>"
+
+    def test_output_is_held_until_chunk_size_is_reached(self):
+        sink = ListSink()
+        out = HTMLOutputStream(sink=sink, chunk_size=10)
+        out.write_text("foo")
+        assert sink.chunks == []
+        out.write_text("bar baz qux")
+        assert sink.chunks == ["foobar baz qux"]
+
+    def test_post_processed_text_reaching_chunk_size(self):
+        sink = ListSink()
+        out = HTMLOutputStream(sink=sink, chunk_size=4)
+        out.write_text("foo & bar", post_process=True)
+        out.write_html("<b>")
+        out.close()
+        assert sink.__html__() == "foo &amp; bar<b>"
+
+    def test_can_flush_explicitly(self):
+        sink = ListSink()
+        out = HTMLOutputStream(sink=sink)
+        out.write_text("foo")
+        out.flush()
+        assert sink.chunks == ["foo"]
+
+    def test_close_flushes_to_sink(self):
+        sink = ListSink()
+        out = HTMLOutputStream(sink=sink)
+        out.start_tag("foo")
+        out.write_text("bar")
+        out.close()
+        assert sink.chunks == ["<foo>bar</foo>"]
+
+    def test_can_write_to_text_file(self):
+        f = io.StringIO()
+        out = HTMLOutputStream(sink=FileSink(f))
+        out.element("p", text=u"caf\u00e9")
+        out.close()
+        assert f.getvalue() == u"<p>caf\u00e9</p>"
+
+    def test_can_write_to_binary_file(self):
+        f = io.BytesIO()
+        out = HTMLOutputStream(sink=FileSink(f, "utf-8"))
+        out.element("p", text=u"caf\u00e9")
+        out.close()
+        assert f.getvalue() == u"<p>caf\u00e9</p>".encode("utf-8")
+
+    def test_can_drain_iterable_sink(self):
+        sink = IterableSink()
+        out = HTMLOutputStream(sink=sink, chunk_size=1)
+        out.write_text("foo")
+        out.write_text("bar")
+        assert sink.drain() == ["foo", "bar"]
+        assert sink.drain() == []
+
+
 if __name__ == "__main__":
     unittest.main()
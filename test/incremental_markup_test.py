@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from syntaq import IncrementalMarkup, Markup
+
+
+SOURCE = "\n\n".join("== Section {0}\n\nParagraph {0} with **bold** text.".format(i) for i in range(50))
+
+
+class IncrementalMarkupTester(unittest.TestCase):
+
+    def test_initial_render_matches_markup(self):
+        markup = IncrementalMarkup(SOURCE)
+        assert markup.__html__() == Markup(SOURCE).__html__()
+        assert markup.title == Markup(SOURCE).title
+
+    def test_unchanged_source_renders_nothing(self):
+        markup = IncrementalMarkup(SOURCE)
+        html, changes = markup.update(SOURCE)
+        assert html == Markup(SOURCE).__html__()
+        assert changes == []
+
+    def test_editing_one_paragraph_renders_one_block(self):
+        markup = IncrementalMarkup(SOURCE)
+        source = SOURCE.replace("Paragraph 20 with", "Paragraph 20 now with")
+        html, changes = markup.update(source)
+        assert html == Markup(source).__html__()
+        assert changes == [(41, "<p>Paragraph 20 now with <strong>bold</strong> text.</p>")]
+
+    def test_inserting_a_block(self):
+        markup = IncrementalMarkup(SOURCE)
+        source = SOURCE.replace("== Section 10\n", "----\n== Section 10\n")
+        html, changes = markup.update(source)
+        assert html == Markup(source).__html__()
+        assert [i for i, _ in changes] == [20]
+
+    def test_joining_paragraphs(self):
+        markup = IncrementalMarkup("foo\n\nbar\n\nbaz")
+        html, changes = markup.update("foo\nbar\n\nbaz")
+        assert html == "<p>foo bar</p><p>baz</p>"
+        assert changes == [(0, "<p>foo bar</p>")]
+
+    def test_opening_a_preformatted_block(self):
+        markup = IncrementalMarkup(SOURCE)
+        source = SOURCE.replace("== Section 40\n", "{{{\n== Section 40\n")
+        html, _ = markup.update(source)
+        assert html == Markup(source).__html__()
+
+    def test_closing_a_preformatted_block(self):
+        source = SOURCE.replace("== Section 40\n", "{{{\n== Section 40\n")
+        markup = IncrementalMarkup(source)
+        source = source.replace("Paragraph 45", "}}}\nParagraph 45")
+        html, _ = markup.update(source)
+        assert html == Markup(source).__html__()
+
+    def test_title_follows_edits(self):
+        markup = IncrementalMarkup(SOURCE)
+        markup.update(SOURCE + "\n= Top")
+        assert markup.title == "Top"
+        markup.update(SOURCE)
+        assert markup.title == "Section 0"
+
+
+if __name__ == "__main__":
+    unittest.main()
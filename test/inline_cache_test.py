@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+import unittest
+
+from syntaq import Grammar, InlineCache, Markup
+
+
+class InlineCacheTester(unittest.TestCase):
+
+    def test_miss_then_hit(self):
+        cache = InlineCache()
+        assert cache.get("foo") is None
+        cache.put("foo", "<b>foo</b>")
+        assert cache.get("foo") == "<b>foo</b>"
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["entries"] == 1
+        assert stats["bytes"] > 0
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = InlineCache(max_entries=2)
+        cache.put("foo", "1")
+        cache.put("bar", "2")
+        cache.get("foo")
+        cache.put("baz", "3")
+        assert cache.get("bar") is None
+        assert cache.get("foo") == "1"
+        assert cache.get("baz") == "3"
+        assert cache.stats()["evictions"] == 1
+
+    def test_entries_are_evicted_to_stay_within_bytes(self):
+        cache = InlineCache(max_bytes=1000)
+        for i in range(100):
+            cache.put("foo {0}".format(i), "bar {0}".format(i))
+        assert cache.stats()["bytes"] <= 1000
+        assert 0 < len(cache) < 100
+
+    def test_oversized_entry_is_not_cached(self):
+        cache = InlineCache(max_bytes=100)
+        cache.put("foo", "x" * 1000)
+        assert len(cache) == 0
+
+    def test_replacing_an_entry_keeps_bytes_accurate(self):
+        cache = InlineCache()
+        cache.put("foo", "bar")
+        size = cache.stats()["bytes"]
+        cache.put("foo", "bar")
+        assert cache.stats()["bytes"] == size
+
+    def test_clear(self):
+        cache = InlineCache()
+        cache.put("foo", "bar")
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.stats()["bytes"] == 0
+
+    def test_concurrent_access(self):
+        cache = InlineCache(max_entries=50)
+
+        def work():
+            for i in range(1000):
+                key = str(i % 80)
+                if cache.get(key) is None:
+                    cache.put(key, key)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = cache.stats()
+        assert stats["hits"] + stats["misses"] == 8000
+        assert len(cache) <= 50
+
+
+class GrammarInlineCacheTester(unittest.TestCase):
+
+    source = "|=Status|=Owner|\n|ok|[[alice]]|\n|ok|[[bob]]|\n|ok|[[alice]]|\n\n* ok\n* ok\n"
+
+    def test_cached_render_matches_uncached(self):
+        grammar = Grammar(inline_cache=InlineCache())
+        assert Markup(self.source, grammar).__html__() == Markup(self.source).__html__()
+
+    def test_repeated_fragments_are_rendered_once(self):
+        cache = InlineCache()
+        Markup(self.source, Grammar(inline_cache=cache)).__html__()
+        stats = cache.stats()
+        assert stats["misses"] == 5
+        assert stats["hits"] == 5
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from syntaq import Document, Markup, MarkupFile, outline, read_chunks, whole_lines
+from syntaq.__main__ import main
+
+
+SOURCE = u"= Café\n\nfoo **bar**\r\n\r\n|a|b|\n|c|d|\n\n{{{\n= not a heading\n}}}\n\n== Section ==\n" + u"é more text\n" * 5000
+
+
+class MarkupFileTester(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, text, name="doc.syntaq"):
+        path = os.path.join(self.root, name)
+        with io.open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        return path
+
+    def test_chunks_join_to_file_text(self):
+        path = self.write(SOURCE)
+        chunks = list(read_chunks(path, chunk_size=mmap.ALLOCATIONGRANULARITY))
+        assert len(chunks) > 1
+        assert u"".join(chunks) == SOURCE
+
+    def test_characters_split_between_chunks_are_decoded(self):
+        # the two bytes of each "é" fall either side of the chunk boundary
+        size = mmap.ALLOCATIONGRANULARITY
+        text = u"a" * (size - 1) + u"é" * size
+        path = self.write(text)
+        assert u"".join(read_chunks(path, chunk_size=size)) == text
+
+    def test_empty_file(self):
+        assert list(read_chunks(self.write(u""))) == []
+
+    def test_whole_lines(self):
+        assert list(whole_lines([u"a\r", u"\nb", u"c\x0cd", u"\ne"])) == [u"a\r\n", u"bc\x0cd\n", u"e"]
+        assert list(whole_lines([u"a", u"b", u"c\n"])) == [u"abc\n"]
+
+    def test_outline_of_chunks(self):
+        chunks = [SOURCE[i:i + 100] for i in range(0, len(SOURCE), 100)]
+        assert outline(iter(chunks)) == outline(SOURCE)
+
+    def test_same_html_as_markup(self):
+        path = self.write(SOURCE)
+        markup = MarkupFile(path)
+        assert markup.title == u"Café"
+        assert markup.__html__() == Markup(SOURCE).__html__()
+        assert markup.__html__() == Markup(SOURCE).__html__()
+
+    def test_document_from_file(self):
+        path = self.write(SOURCE)
+        document = Document.from_file(path, stylesheet="syntaq.css")
+        assert document.__html__() == Document(SOURCE, stylesheet="syntaq.css").__html__()
+        assert document.render_bytes() == Document(SOURCE, stylesheet="syntaq.css").render_bytes()
+
+    def test_command_line(self):
+        path = self.write(SOURCE)
+        stdout, sys.stdout = sys.stdout, io.StringIO()
+        try:
+            assert main([path]) == 0
+            output = sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+        assert output == Document(SOURCE).__html__() + u"\n"
+
+
+if __name__ == "__main__":
+    unittest.main()
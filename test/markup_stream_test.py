@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import unittest
+
+from syntaq import Markup, MarkupStream
+
+
+FULL = os.path.join(os.path.dirname(__file__), "full.syntaq")
+
+
+class MarkupStreamTester(unittest.TestCase):
+
+    def test_empty_source(self):
+        assert list(MarkupStream("")) == []
+
+    def test_yields_one_fragment_per_block(self):
+        stream = MarkupStream("= foo\nbar\n\n* baz\n* qux\n{{{\nquux\n}}}\n")
+        assert list(stream) == [
+            "<h1>foo</h1>",
+            "<p>bar</p>",
+            "<ul><li>baz</li><li>qux</li></ul>",
+            "<pre>quux\n</pre>",
+        ]
+
+    def test_same_html_as_markup(self):
+        with io.open(FULL, encoding="utf-8") as f:
+            source = f.read()
+        assert "".join(MarkupStream(source)) == Markup(source).__html__()
+
+    def test_can_stream_from_file(self):
+        with io.open(FULL, encoding="utf-8") as f:
+            source = f.read()
+        with io.open(FULL, encoding="utf-8") as f:
+            assert "".join(MarkupStream(f)) == Markup(source).__html__()
+
+    def test_can_stream_from_arbitrary_chunks(self):
+        source = "= foo\nbar **baz\nqux** quux\n|a|b|\n|c|d|\n```\ncode\n```"
+        chunks = [source[i:i + 3] for i in range(0, len(source), 3)]
+        assert "".join(MarkupStream(chunks)) == Markup(source).__html__()
+
+    def test_line_break_split_between_chunks(self):
+        source = "{{{\r\nfoo\r\n}}}\r\nbar\r\n"
+        chunks = ["{{{\r", "\nfoo\r", "\n}}}\r", "\nbar\r", "\n"]
+        assert "".join(MarkupStream(chunks)) == Markup(source).__html__()
+
+    def test_blocks_are_yielded_as_they_close(self):
+        consumed = []
+
+        def lines():
+            for line in ["foo\n", "\n", "bar\n"]:
+                consumed.append(line)
+                yield line
+
+        stream = iter(MarkupStream(lines()))
+        assert next(stream) == "<p>foo</p>"
+        assert consumed == ["foo\n", "\n"]
+
+    def test_tables_are_rendered_in_batches_of_rows(self):
+        source = "foo\n|=a|=b|\n" + "".join("|{0}|**{0}**|\n".format(i) for i in range(10)) + "bar\n"
+        for table_rows in (1, 3, 11, 12, None):
+            assert "".join(MarkupStream(source, table_rows=table_rows)) == Markup(source).__html__()
+        fragments = list(MarkupStream(source, table_rows=4))
+        assert fragments[1].startswith('<table cellspacing="0">') and fragments[1].count("<tr>") == 4
+        assert fragments[3].endswith("</table>") and fragments[3].count("<tr>") == 3
+
+    def test_table_rows_are_rendered_as_they_are_read(self):
+        consumed = []
+
+        def lines():
+            for i in range(20000):
+                consumed.append(i)
+                yield "|{0}|{0}|\n".format(i)
+
+        stream = iter(MarkupStream(lines(), table_rows=10))
+        assert next(stream).count("<tr>") == 10
+        assert len(consumed) == 11
+        assert sum(fragment.count("<tr>") for fragment in stream) == 19990
+
+    def test_title_is_reported(self):
+        stream = MarkupStream("== foo\nbar\n= baz\n")
+        fragments = iter(stream)
+        next(fragments)
+        assert stream.title == "foo"
+        list(fragments)
+        assert stream.title == "baz"
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -162,6 +162,7 @@ class PreformattedTester(unittest.TestCase):
         ("{{{\nfoo\n}}}\n{{{\nbar\n}}}", "<pre>foo\n</pre><pre>bar\n</pre>"),
         ("{{{\nfoo\n----\nbar\n}}}", "<pre>foo\n----\nbar\n</pre>"),
         ("{{{\nfoo\n**bar**\n}}}", "<pre>foo\n**bar**\n</pre>"),
+        ("{{{\nfoo\r\n<bar>\rbaz", "<pre>foo\r\n&lt;bar&gt;\rbaz</pre>"),
     ]
 
     def test_all(self):
@@ -180,6 +181,8 @@ class CodeBlockTester(unittest.TestCase):
         ("```\nfoo\n```", "<pre><ol><li><code>foo\n</code></li></ol></pre>"),
         ("``` foo bar\nbaz\n```", "<pre class=\"foo bar\"><ol><li><code>baz\n</code></li></ol></pre>"),
         ("```\nfoo\nbar\n```", "<pre><ol><li><code>foo\n</code></li><li><code>bar\n</code></li></ol></pre>"),
+        ("```\na < b\r\nc & d\r```", "<pre><ol><li><code>a &lt; b\r\n</code></li><li><code>c &amp; d\r</code></li></ol></pre>"),
+        ("```\nfoo\n\nbar", "<pre><ol><li><code>foo\n</code></li><li><code>\n</code></li><li><code>bar</code></li></ol></pre>"),
     ]
 
     def test_all(self):
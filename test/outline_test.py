@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import unittest
+
+from syntaq import HeadingMarkup, Markup, outline
+
+
+FULL = os.path.join(os.path.dirname(__file__), "full.syntaq")
+
+
+class OutlineTester(unittest.TestCase):
+
+    def test_empty_source(self):
+        assert outline("") == (None, [])
+
+    def test_headings(self):
+        source = "== Intro ==\ntext\n= Title\n|=a|b|\n=== Detail\n"
+        assert outline(source) == ("Title", [(2, "Intro", 0), (1, "Title", 2), (3, "Detail", 4)])
+
+    def test_headings_in_fences_are_ignored(self):
+        source = "{{{\n= not a heading\n```\n}}}\n= One\n```\n= not a heading\n}}}\n```\n== Two"
+        assert outline(source) == ("One", [(1, "One", 4), (2, "Two", 9)])
+
+    def test_other_line_breaks(self):
+        source = "= One\r\n{{{\r= not a heading\r}}}\x0c== Two\u2028=== Three"
+        assert outline(source) == ("One", [(1, "One", 0), (2, "Two", 4), (3, "Three", 5)])
+
+    def test_can_read_from_chunks(self):
+        source = "= One\r\n{{{\r\n= not a heading\r\n}}}\r\n== Two"
+        chunks = [source[i:i + 4] for i in range(0, len(source), 4)]
+        assert outline(chunks) == outline(source)
+
+    def test_same_as_full_parse(self):
+        with io.open(FULL, encoding="utf-8") as f:
+            source = f.read()
+        markup = Markup(source)
+        headings = [(block.lines[0].level, block.lines[0].text, block.start)
+                    for block in markup.blocks if block.content_type is HeadingMarkup]
+        assert outline(source) == (markup.title, headings)
+
+
+if __name__ == "__main__":
+    unittest.main()
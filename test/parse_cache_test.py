@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from syntaq import ROW_LINE, Grammar, Markup, ParseCache, TokenRegistry
+
+
+class ParseCacheTester(unittest.TestCase):
+
+    source = open(os.path.join(os.path.dirname(__file__), "full.syntaq")).read()
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_dump_and_load_round_trip(self):
+        markup = Markup(self.source)
+        loaded = Markup.load(markup.dump())
+        assert loaded.title == markup.title
+        assert loaded.__html__() == markup.__html__()
+        assert [(block.start, block.end) for block in loaded.blocks] == \
+               [(block.start, block.end) for block in markup.blocks]
+
+    def test_loaded_markup_renders_without_restoring_blocks(self):
+        markup = Markup(self.source)
+        loaded = Markup.load(markup.dump())
+        assert loaded.__html__() == markup.__html__()
+        assert loaded.render_range(2, 9) == markup.render_range(2, 9)
+        assert "blocks" not in loaded.__dict__
+
+    def test_restored_blocks_match_parsed_blocks(self):
+        markup = Markup(self.source)
+        loaded = Markup.load(markup.dump())
+        for restored, parsed in zip(loaded.blocks, markup.blocks):
+            assert restored.content_type is parsed.content_type
+            assert restored.params == parsed.params
+            assert not restored.continued
+            assert len(restored.lines) == len(parsed.lines)
+            for restored_line, parsed_line in zip(restored.lines, parsed.lines):
+                assert type(restored_line) is type(parsed_line)
+                for slot in getattr(parsed_line, "__slots__", ()):
+                    assert getattr(restored_line, slot) == getattr(parsed_line, slot)
+        assert len(loaded) == len(markup)
+
+    def test_load_rejects_other_versions(self):
+        markup = Markup(self.source)
+        markup.dump_version = 0
+        with self.assertRaises(ValueError):
+            Markup.load(markup.dump())
+
+    def test_miss_then_hit(self):
+        cache = ParseCache(self.directory)
+        assert cache.get(self.source) is None
+        html = cache.markup(self.source).__html__()
+        assert cache.get(self.source).__html__() == html
+        assert html == Markup(self.source).__html__()
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_grammars_with_other_line_starts_are_cached_apart(self):
+        registry = TokenRegistry.default()
+        registry.remove_block(ROW_LINE)
+        grammar = Grammar(registry=registry)
+        cache = ParseCache(self.directory)
+        assert "<table" in cache.markup("|a|b|\n").__html__()
+        assert cache.markup("|a|b|\n", grammar).__html__() == Markup("|a|b|\n", grammar).__html__()
+        assert cache.path("|a|b|\n", Grammar()) == cache.path("|a|b|\n")
+
+    def test_cache_is_shared_between_instances(self):
+        ParseCache(self.directory).markup(self.source)
+        assert ParseCache(self.directory).get(self.source) is not None
+
+    def test_no_temporary_files_are_left(self):
+        cache = ParseCache(self.directory)
+        cache.markup(self.source)
+        assert [name for name in os.listdir(self.directory) if name.endswith(".tmp")] == []
+
+    def test_corrupt_entry_is_a_miss(self):
+        cache = ParseCache(self.directory)
+        cache.markup(self.source)
+        with open(cache.path(self.source), "wb") as f:
+            f.write(b"\x00garbage")
+        assert cache.get(self.source) is None
+
+    def test_least_recently_used_entries_are_evicted(self):
+        sources = ["= Page {0} =\n\n".format(i) + "foo " * 100 for i in range(3)]
+        size = len(Markup(sources[0]).dump())
+        cache = ParseCache(self.directory, max_bytes=2 * size + size // 2)
+        for i, source in enumerate(sources[:2]):
+            cache.put(source, Markup(source))
+            os.utime(cache.path(source), (i, i))
+        cache.get(sources[0])
+        cache.put(sources[2], Markup(sources[2]))
+        assert cache.get(sources[1]) is None
+        assert cache.get(sources[0]) is not None
+        assert cache.get(sources[2]) is not None
+        assert cache.size <= cache.max_bytes
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -38,6 +38,64 @@ class PartitionerTester(unittest.TestCase):
         tokens = list(t.partition("foo~bar"))
         assert tokens == ["foo~bar"]
 
+    def test_can_partition_with_escaped_escape(self):
+        t = Partitioner("~", "**")
+        tokens = list(t.partition("foo~~**bar"))
+        assert tokens == ["foo", "~~", "**", "bar"]
+
+    def test_can_partition_with_trailing_escape(self):
+        t = Partitioner("~", "**")
+        tokens = list(t.partition("foo**~"))
+        assert tokens == ["foo", "**", "~"]
+
+    def test_earlier_marker_takes_precedence(self):
+        t = Partitioner("~", "{{{", "{{")
+        tokens = list(t.partition("{{{foo{{"))
+        assert tokens == ["{{{", "foo", "{{"]
+
+    def test_can_partition_without_escape(self):
+        t = Partitioner(None, "**")
+        tokens = list(t.partition("foo~**bar"))
+        assert tokens == ["foo~", "**", "bar"]
+
+    def test_cannot_use_unknown_engine(self):
+        try:
+            Partitioner("~", "**", engine="foo")
+            assert False
+        except ValueError:
+            assert True
+
+
+class PartitionerEngineTester(unittest.TestCase):
+
+    markers = (
+        "http://", "https://", "ftp://", "mailto:",
+        '"""', "{{{", "}}}", "<--", "-->",
+        "\\\\", "{{", "}}", "``", '""',
+        "**", "//", "^^", ",,", "[[", "]]", "|",
+    )
+
+    tests = [
+        "",
+        "foo bar",
+        "foo **bar** //baz//",
+        "~~~**~//~",
+        "~http://example.com/ http://example.com/",
+        "{{{{{{}}}}}}",
+        "[[foo|bar]] [[baz~|qux]]",
+        '""""""""',
+        "<---> <-- -->",
+        "~",
+        "foo~",
+        "~ ~ ~",
+    ]
+
+    def test_engines_are_equivalent(self):
+        scan = Partitioner("~", *self.markers, engine="scan")
+        regex = Partitioner("~", *self.markers, engine="regex")
+        for markup in self.tests:
+            assert list(scan.partition(markup)) == list(regex.partition(markup))
+
 
 if __name__ == "__main__":
     unittest.main()
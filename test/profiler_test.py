@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+import unittest
+
+import syntaq
+from syntaq import BlockParser, Document, HTML, Markup, Profiler
+
+
+SOURCE = "= Title\n\nfoo **bar** http://example.com/\n\n* baz\n\n|a|b|\n\n{{{\nqux\n}}}\n"
+
+
+class ProfilerTester(unittest.TestCase):
+
+    def test_output_is_unchanged(self):
+        with Profiler():
+            html = Document(SOURCE).__html__()
+        assert html == Document(SOURCE).__html__()
+
+    def test_stages_are_recorded(self):
+        with Profiler() as profiler:
+            Markup(SOURCE).__html__()
+        stats = profiler.stats()
+        assert stats["classify"]["calls"] == 1
+        assert stats["parse:heading"]["calls"] == 1
+        assert stats["parse:table_row"]["calls"] == 1
+        assert stats["render:paragraph"]["calls"] == 1
+        assert stats["render:table"]["calls"] == 1
+        assert stats["render:preformatted"]["calls"] == 1
+        assert stats["autolink"]["calls"] >= 1
+        assert stats["partition"]["calls"] >= 1
+        for stage in stats.values():
+            assert 0 <= stage["own_time"] <= stage["time"] + 1e-6
+
+    def test_hooks_are_removed_on_exit(self):
+        parse, entities, write_block = BlockParser.parse, HTML.entities, syntaq.write_block
+        with Profiler():
+            assert BlockParser.parse is not parse
+        assert BlockParser.parse is parse
+        assert HTML.entities is entities
+        assert syntaq.write_block is write_block
+
+    def test_only_one_profiler_at_a_time(self):
+        with Profiler():
+            try:
+                with Profiler():
+                    pass
+                assert False
+            except ValueError:
+                assert True
+
+    def test_other_threads_are_not_recorded(self):
+        results = []
+        with Profiler() as profiler:
+            thread = threading.Thread(target=lambda: results.append(Markup(SOURCE).__html__()))
+            thread.start()
+            thread.join()
+        assert results == [Markup(SOURCE).__html__()]
+        assert profiler.stats() == {}
+        assert profiler.stack == []
+
+    def test_report(self):
+        with Profiler() as profiler:
+            Markup(SOURCE).__html__()
+        report = profiler.report()
+        assert report.startswith("stage")
+        assert "render:table" in report
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from syntaq import Markup, Section
+
+
+SOURCE = u"""\
+Preamble.
+
+= One
+
+First **para**.
+
+== One A
+
+* a
+* b
+
+== One B
+
+|x|y|
+
+= Two
+
+{{{
+pre
+}}}
+
+=== Two A
+
+Last.
+"""
+
+
+class RandomAccessTester(unittest.TestCase):
+
+    def test_block_count(self):
+        markup = Markup(SOURCE)
+        assert len(markup) == len(markup.blocks) == 11
+
+    def test_blocks_join_to_whole_document(self):
+        for memoize in (False, True):
+            markup = Markup(SOURCE, memoize=memoize)
+            assert "".join(markup.render(i) for i in range(len(markup))) == Markup(SOURCE).__html__()
+
+    def test_render(self):
+        markup = Markup(SOURCE)
+        assert markup.render(1) == "<h1>One</h1>"
+        assert markup.render(-1) == "<p>Last.</p>"
+        self.assertRaises(IndexError, markup.render, 11)
+
+    def test_render_range(self):
+        markup = Markup(SOURCE)
+        assert markup.render_range(1, 3) == "<h1>One</h1><p>First <strong>para</strong>.</p>"
+        assert markup.render_range(9) == markup.render(9) + markup.render(10)
+        assert markup.render_range(-2, -1) == markup.render(9)
+        assert markup.render_range(20, 30) == ""
+
+    def test_only_requested_blocks_are_rendered(self):
+        markup = Markup(SOURCE)
+        markup.blocks[0].content_type = object
+        assert markup.render_range(1, 3) == "<h1>One</h1><p>First <strong>para</strong>.</p>"
+
+    def test_memoized_blocks_are_rendered_once(self):
+        markup = Markup(SOURCE, memoize=True)
+        assert markup.render(2) is markup.render(2)
+        assert markup.render(-9) is markup.render(2)
+        assert sorted(markup.rendered) == [2]
+        markup.__html__()
+        assert sorted(markup.rendered) == list(range(11))
+
+    def test_sections(self):
+        assert Markup(SOURCE).sections() == [
+            Section(1, "One", 1, 7),
+            Section(2, "One A", 3, 5),
+            Section(2, "One B", 5, 7),
+            Section(1, "Two", 7, 11),
+            Section(3, "Two A", 9, 11),
+        ]
+
+    def test_render_section(self):
+        markup = Markup(SOURCE)
+        assert markup.render_section(1) == "<h2>One A</h2><ul><li>a</li><li>b</li></ul>"
+        assert markup.render_section(-1) == markup.render_range(9, 11)
+
+    def test_loaded_markup(self):
+        markup = Markup.load(Markup(SOURCE).dump(), memoize=True)
+        assert len(markup) == 11
+        assert markup.render_section(0) == Markup(SOURCE).render_range(1, 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import threading
+import unittest
+
+from syntaq import DEFAULT_GRAMMAR, Document, InlineMarkup, Markup, Partitioner, render_many_threaded
+
+
+DOCUMENTS = ["= Page {0}\n\nSome **text** on //page// {0}, see http://example.com/{0}.\n\n"
+             "* one\n* two\n\n|a|``b``|\n".format(i) * 5 for i in range(60)]
+
+
+def run_threads(count, target):
+    errors = []
+
+    def run():
+        try:
+            target()
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=run) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+class ThreadSafetyTester(unittest.TestCase):
+
+    def test_partitioner_holds_no_call_state(self):
+        for engine in Partitioner.engines:
+            partitioner = Partitioner("~", "**", "//", engine=engine)
+            before = dict(partitioner.__dict__)
+            first = partitioner.partition("a**b//c")
+            second = partitioner.partition("x//y")
+            assert list(second) == ["x", "//", "y"]
+            assert list(first) == ["a", "**", "b", "//", "c"]
+            assert partitioner.__dict__ == before
+
+    def test_grammar_tables_are_read_only(self):
+        try:
+            DEFAULT_GRAMMAR.toggle_tokens["@@"] = "mark"
+        except TypeError:
+            pass
+        assert "@@" not in DEFAULT_GRAMMAR.toggle_tokens
+
+    def test_shared_grammar_across_threads(self):
+        expected = [Markup(document).__html__() for document in DOCUMENTS]
+
+        def render():
+            for document, html in zip(DOCUMENTS, expected):
+                assert Markup(document).__html__() == html
+                assert InlineMarkup("**a** ~**b~** //c//").__html__() == \
+                    "<strong>a</strong> **b** <em>c</em>"
+
+        assert run_threads(8, render) == []
+
+    def test_loaded_markup_is_restored_once(self):
+        data = Markup(DOCUMENTS[0]).dump()
+        for _ in range(20):
+            markup = Markup.load(data)
+            assert run_threads(4, lambda: markup.__html__()) == []
+            assert markup.__html__() == Markup(DOCUMENTS[0]).__html__()
+
+
+class RenderManyThreadedTester(unittest.TestCase):
+
+    def test_results_in_order(self):
+        results = list(render_many_threaded(DOCUMENTS, workers=4, chunksize=3))
+        assert [result.id for result in results] == list(range(60))
+        assert [result.html for result in results] == [Document(d).__html__() for d in DOCUMENTS]
+
+    def test_unordered_results_carry_ids(self):
+        results = list(render_many_threaded(DOCUMENTS, workers=4, chunksize=3, ordered=False))
+        assert sorted(result.id for result in results) == list(range(60))
+        for result in results:
+            assert result.html == Document(DOCUMENTS[result.id]).__html__()
+
+    def test_errors_are_captured_per_document(self):
+        results = list(render_many_threaded(["foo", b"\xff", "bar"], workers=2, chunksize=1))
+        assert results[0].html is not None
+        assert results[1].error.startswith("AttributeError")
+        assert results[2].html is not None
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import re
+import unittest
+
+from syntaq import DEFAULT_GRAMMAR, ITEM_LINE, ROW_LINE, Grammar, InlineMarkup, Markup, TokenRegistry
+
+
+SAMPLE = u"foo **bar** //baz// [[qux|quux]] {{img.png|alt}} ``code`` ~**x http://example.com/a//b"
+
+
+def mention(out, tokens, token):
+    text = tokens.peek()
+    name = re.match(r"\w*", text or "").group()
+    if name:
+        tokens.advance()
+        out.write_html(u'<a class="mention" href="/users/{0}">@{0}</a>'.format(name))
+        out.write_text(text[len(name):], post_process=True)
+    else:
+        out.write_text(token)
+
+
+class TokenRegistryTester(unittest.TestCase):
+
+    def test_default_registry_renders_same_html(self):
+        grammar = Grammar(registry=TokenRegistry.default())
+        assert InlineMarkup(SAMPLE, grammar).__html__() == InlineMarkup(SAMPLE).__html__()
+
+    def test_registry_is_copied_when_compiled(self):
+        registry = TokenRegistry.default()
+        grammar = Grammar(registry=registry)
+        registry.add_toggle("__", "u")
+        assert InlineMarkup("__a__", grammar).__html__() == "__a__"
+        assert InlineMarkup("__a__", Grammar(registry=registry)).__html__() == "<u>a</u>"
+
+    def test_added_toggle(self):
+        registry = TokenRegistry.default()
+        registry.add_toggle("__", "u")
+        grammar = Grammar(registry=registry)
+        assert InlineMarkup("a __b__ ~__c", grammar).__html__() == "a <u>b</u> __c"
+
+    def test_added_handler(self):
+        registry = TokenRegistry.default()
+        registry.add("@", mention)
+        grammar = Grammar(registry=registry)
+        assert InlineMarkup("hi @bob and @ you", grammar).__html__() == \
+            'hi <a class="mention" href="/users/bob">@bob</a> and @ you'
+
+    def test_added_simple_token(self):
+        registry = TokenRegistry.default()
+        registry.add_simple("(c)", "&copy;")
+        assert InlineMarkup("(c) 2012", Grammar(registry=registry)).__html__() == "&copy; 2012"
+
+    def test_longer_markers_win_whatever_the_order(self):
+        registry = TokenRegistry.default()
+        registry.add_simple("=", "[eq]")
+        registry.add_simple("==", "[eqeq]")
+        registry.add_simple("<==", "[arrow]")
+        assert InlineMarkup("a == b <== c", Grammar(registry=registry)).__html__() == \
+            "a [eqeq] b [arrow] c"
+
+    def test_removed_tokens(self):
+        registry = TokenRegistry.default()
+        registry.remove("{{", "}}")
+        assert "{{" not in registry
+        grammar = Grammar(registry=registry)
+        assert InlineMarkup("{{img.png}} **b**", grammar).__html__() == "{{img.png}} <strong>b</strong>"
+
+    def test_removed_block(self):
+        registry = TokenRegistry.default()
+        registry.remove_block(ROW_LINE)
+        grammar = Grammar(registry=registry)
+        assert Markup("|a|**b**|", grammar).__html__() == "<p>|a|<strong>b</strong>|</p>"
+        assert Markup("|a|**b**|").__html__() != Markup("|a|**b**|", grammar).__html__()
+
+    def test_removed_list_items_are_text_when_indented(self):
+        registry = TokenRegistry.default()
+        registry.remove_block(ITEM_LINE)
+        grammar = Grammar(registry=registry)
+        html = Markup("* top\n  * indented", grammar).__html__()
+        assert "<li>" not in html
+        assert html.startswith("<p>* top")
+        assert "<li>indented</li>" in Markup("* top\n  * indented").__html__()
+
+    def test_invalid_changes(self):
+        registry = TokenRegistry.default()
+        self.assertRaises(ValueError, registry.add, "")
+        self.assertRaises(ValueError, registry.add, "~x")
+        self.assertRaises(ValueError, registry.remove, "@@")
+
+    def test_default_grammar_is_unchanged(self):
+        TokenRegistry.default().remove("**")
+        assert InlineMarkup("**a**").grammar is DEFAULT_GRAMMAR
+        assert InlineMarkup("**a**").__html__() == "<strong>a</strong>"
+
+
+if __name__ == "__main__":
+    unittest.main()
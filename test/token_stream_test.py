@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+import unittest
+
+from syntaq import InlineMarkup, TableRowMarkup, TokenStream
+
+
+class TokenStreamTester(unittest.TestCase):
+
+    def test_can_advance(self):
+        tokens = TokenStream(["foo", "**", "bar"])
+        assert tokens.advance() == "foo"
+        assert tokens.advance() == "**"
+        assert tokens.advance() == "bar"
+        assert not tokens
+
+    def test_cannot_advance_past_end(self):
+        tokens = TokenStream([])
+        try:
+            tokens.advance()
+            assert False
+        except ValueError:
+            assert True
+
+    def test_can_peek(self):
+        tokens = TokenStream(["foo", "bar"])
+        assert tokens.peek() == "foo"
+        assert tokens.peek() == "foo"
+        assert len(tokens) == 2
+
+    def test_peek_at_end_returns_none(self):
+        tokens = TokenStream([])
+        assert tokens.peek() is None
+
+    def test_can_consume_until_end_token(self):
+        tokens = TokenStream(["foo", "bar", "]]", "baz"])
+        assert tokens.consume_until("|", "]]") == (["foo", "bar"], "]]")
+        assert tokens.advance() == "baz"
+
+    def test_can_consume_until_exhausted(self):
+        tokens = TokenStream(["foo", "bar"])
+        assert tokens.consume_until("]]") == (["foo", "bar"], None)
+        assert not tokens
+
+
+class LinearScalingTester(unittest.TestCase):
+
+    @staticmethod
+    def _time(function, markup):
+        t0 = time.time()
+        function(markup)
+        return time.time() - t0
+
+    def _assert_linear(self, function, unit):
+        small = unit * (256 * 1024 // len(unit))
+        large = unit * (1024 * 1024 // len(unit))
+        small_time = min(self._time(function, small) for _ in range(3))
+        large_time = self._time(function, large)
+        # four times the input should take roughly four times as long; a
+        # quadratic loop would take around sixteen times as long
+        assert large_time < 8 * small_time + 0.1
+
+    def test_inline_markup_scales_linearly(self):
+        self._assert_linear(lambda markup: InlineMarkup(markup).__html__(),
+                            "**foo** //bar// [[baz|qux]] {{img.png}} ")
+
+    def test_table_row_markup_scales_linearly(self):
+        self._assert_linear(lambda markup: TableRowMarkup(markup).cells,
+                            "|foo|``bar``|[[baz|qux]]")
+
+
+if __name__ == "__main__":
+    unittest.main()